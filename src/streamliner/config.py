@@ -38,6 +38,8 @@ class StorageConfig:
 class MonitoringConfig:
     check_interval_seconds: int = 60
     reconnect_delay_seconds: int = 30
+    # Techo del intervalo adaptativo: sin nadie en vivo, el sondeo se espacia hasta aquí
+    max_check_interval_seconds: int = 300
 
 
 @dataclass
@@ -59,6 +61,10 @@ class DetectionConfig:
     rms_peak_threshold: float
     scoring: ScoringConfig
     max_clips_per_vod: int = 3
+    # Candidatos que se extraen/transcriben en paralelo cuando no se usa el lote
+    parallel_transcriptions: int = 2
+    # Highlights de un VOD que se cortan/renderizan en paralelo
+    max_parallel_clips: int = 2
     keywords: dict[str, float] = field(default_factory=dict)
     streamer_keywords: dict[str, dict[str, float]] = field(default_factory=dict)
 
@@ -68,6 +74,8 @@ class TranscriptionConfig:
     whisper_model: str
     device: str
     compute_type: str
+    # Tamaño de lote de BatchedInferencePipeline en GPU (0 = transcripción secuencial)
+    batch_size: int = 0
 
 
 @dataclass
@@ -86,6 +94,17 @@ class RenderingConfig:
     subtitle_mode: str = "plain"  # 'plain' o 'karaoke'
     subtitle_color_base: str = "&H00FFFFFF"  # Blanco sin alpha (AA=00)
     subtitle_color_highlight: str = "&H0000FFFF"  # Amarillo para resaltado
+    # Shaper de libass para subtítulos ASS: 'simple' (rápido) o 'complex' (HarfBuzz)
+    subtitle_shaping: str = "simple"
+    # Preset de libx264: 'superfast' es ~2x más rápido que 'fast' por unos % de tamaño
+    x264_preset: str = "superfast"
+    # Encoder de video: 'libx264' (CPU) o 'h264_nvenc' (GPU NVIDIA, si ffmpeg lo soporta)
+    video_encoder: str = "libx264"
+    # Watchdog del render: se aborta si ffmpeg no avanza o tarda demasiado
+    render_stall_seconds: int = 60
+    render_timeout_seconds: int = 900
+    # Hilos de ffmpeg en el render (0 = la mitad de los núcleos, mínimo 2)
+    ffmpeg_threads: int = 0
 
 
 @dataclass
@@ -1,20 +1,210 @@
 # src/streamliner/detector.py
 
 import asyncio
+import heapq
+import math
 import os
+import struct
+import tempfile
 import numpy as np
 import soundfile as sf
-from scipy.signal import find_peaks
 from loguru import logger
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
-from .stt import Transcriber
+from .stt import Transcriber, TranscriptionResult
+
+try:  # Backend opcional en C+SIMD para RMS por ventanas (extra 'fast')
+    import numpy_rms
+except ImportError:  # pragma: no cover - depende del entorno
+    numpy_rms = None
+
+try:  # Autómata Aho-Corasick para buscar todas las keywords en una sola pasada
+    import ahocorasick
+except ImportError:  # pragma: no cover - depende del entorno
+    ahocorasick = None
+
+try:  # PyAV (dependencia de faster-whisper) para decodificar contenedores directamente
+    import av
+except ImportError:  # pragma: no cover - depende del entorno
+    av = None
+
+try:  # Alternativa JIT con Numba si numpy-rms no está instalado
+    from numba import njit, prange
+except ImportError:  # pragma: no cover - depende del entorno
+    njit = None
 
 from .config import (
     DetectionConfig,
 )
 
+# Errores esperables al decodificar audio: E/S, formato que libsndfile no soporta
+# (RuntimeError), datos inválidos y, si PyAV está disponible, sus FFmpegError
+AUDIO_DECODE_ERRORS: tuple[type[Exception], ...] = (
+    OSError,
+    RuntimeError,
+    ValueError,
+) + ((av.error.FFmpegError,) if av is not None else ())
+
+
+if njit is not None:
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _rms_windows(x: np.ndarray, w: int) -> np.ndarray:
+        """RMS por ventanas no solapadas de tamaño `w`, paralelizado por ventana."""
+        n = x.shape[0] // w
+        out = np.empty(n, np.float32)
+        for i in prange(n):
+            s = 0.0
+            for j in range(w):
+                v = x[i * w + j]
+                s += v * v
+            out[i] = math.sqrt(s / w)
+        return out
+
+else:
+    _rms_windows = None
+
+# Muestras (por canal) leídas del WAV en cada bloque al calcular el RMS
+RMS_BLOCK_SAMPLES = 1 << 20
+# Duración (y salto) de cada ventana RMS: un índice de la serie RMS son estos segundos
+RMS_WINDOW_SECONDS = 1.0
+
+# Frecuencia que Whisper espera al recibir audio como array
+WHISPER_SAMPLE_RATE = 16000
+# Silencio insertado entre candidatos al transcribirlos en lote
+BATCH_SILENCE_PAD_SECONDS = 0.03
+# Hasta este número de keywords, recorrer la lista precomputada supera al
+# autómata Aho-Corasick (sin coste de recorrer el DFA)
+KEYWORD_SCORER_MAX = 32
+
+
+def _rms_of_windows(audio_data: np.ndarray, window_size: int) -> np.ndarray:
+    """RMS de ventanas consecutivas de `window_size` muestras (audio mono float32)."""
+    num_windows = len(audio_data) // window_size
+    audio_data = audio_data[: num_windows * window_size]
+    if numpy_rms is not None:
+        return numpy_rms.rms(np.ascontiguousarray(audio_data), window_size)
+    if _rms_windows is not None:
+        return _rms_windows(audio_data, window_size)
+
+    # Una sola pasada vectorizada: (ventanas, muestras) y einsum fusiona cuadrado+suma
+    frames = audio_data.reshape(num_windows, window_size)
+    return np.sqrt(np.einsum("ij,ij->i", frames, frames) / window_size)
+
+
+def _map_wav_pcm(path) -> Optional[tuple[np.ndarray, int]]:
+    """
+    Proyecta en memoria (mmap) el chunk `data` de un WAV PCM de 16 bits o float32,
+    como array (frames, canales) sin copiar ni decodificar. Devuelve None si el
+    archivo no es un WAV de ese tipo, para que el llamador use soundfile.
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read(4) != b"RIFF" or f.read(8)[4:] != b"WAVE":
+                return None
+            dtype = channels = sample_rate = None
+            while header := f.read(8):
+                if len(header) < 8:
+                    return None
+                chunk_id, chunk_size = header[:4], struct.unpack("<I", header[4:])[0]
+                if chunk_id == b"fmt ":
+                    fmt = f.read(chunk_size + (chunk_size & 1))
+                    audio_format, channels, sample_rate = struct.unpack("<HHI", fmt[:8])
+                    bits = struct.unpack("<H", fmt[14:16])[0]
+                    if audio_format == 0xFFFE and chunk_size >= 26:
+                        audio_format = struct.unpack("<H", fmt[24:26])[0]
+                    dtype = {(1, 16): np.int16, (3, 32): np.float32}.get(
+                        (audio_format, bits)
+                    )
+                    if dtype is None:
+                        return None
+                elif chunk_id == b"data":
+                    if dtype is None:
+                        return None
+                    data_offset = f.tell()
+                    # ffmpeg sin seek puede dejar el tamaño a 0xFFFFFFFF: acotar al archivo
+                    available = os.fstat(f.fileno()).st_size - data_offset
+                    data_size = min(chunk_size, available)
+                    break
+                else:
+                    f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+            else:
+                return None
+    except (OSError, struct.error):
+        return None
+
+    frames = data_size // (np.dtype(dtype).itemsize * channels)
+    if frames == 0:
+        return None
+    pcm = np.memmap(
+        path, dtype=dtype, mode="r", offset=data_offset, shape=(frames, channels)
+    )
+    return pcm, sample_rate
+
+
+def _pcm_to_mono_float32(block: np.ndarray) -> np.ndarray:
+    """Convierte un bloque (frames, canales) int16/float32 a mono float32 en [-1, 1)."""
+    if block.shape[1] == 1:
+        mono = block[:, 0].astype(np.float32)
+    else:
+        mono = block.mean(axis=1, dtype=np.float32)
+    if block.dtype == np.int16:
+        mono *= np.float32(1 / 32768)
+    return mono
+
+
+def _make_keyword_scorer(keywords: list[tuple[str, float]]):
+    """
+    Devuelve una función `f(texto_en_minúsculas) -> score` especializada para una
+    lista fija de keywords: los pares (keyword, peso) se fijan una vez en el cierre,
+    con los pesos ya convertidos a float.
+    """
+    pairs = tuple((keyword, float(weight)) for keyword, weight in keywords)
+
+    def _score(text_lower: str) -> float:
+        return sum(weight for keyword, weight in pairs if keyword in text_lower)
+
+    return _score
+
+
+def _find_rms_peaks(values: np.ndarray, height: float, distance: int) -> np.ndarray:
+    """
+    Máximos locales de `values` >= `height` separados al menos `distance` muestras.
+    Equivale a `scipy.signal.find_peaks(values, height=..., distance=...)` (las
+    mesetas cuentan como un pico en su punto medio) pero con barridos de NumPy.
+    """
+    if values.size < 3:
+        return np.empty(0, dtype=np.intp)
+
+    # Colapsar mesetas: cada tramo de valores iguales es un único "punto"
+    run_starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+    run_ends = np.r_[run_starts[1:], values.size] - 1
+    run_values = values[run_starts]
+
+    # Máximo local estricto entre tramos vecinos (los extremos nunca son picos)
+    is_peak = np.zeros(run_values.size, dtype=bool)
+    is_peak[1:-1] = (run_values[1:-1] > run_values[:-2]) & (
+        run_values[1:-1] > run_values[2:]
+    )
+    is_peak &= run_values >= height
+    peaks = (run_starts[is_peak] + run_ends[is_peak]) // 2
+    if peaks.size < 2 or distance <= 1:
+        return peaks
+
+    # Distancia mínima: los picos más altos descartan a sus vecinos cercanos.
+    # Mismo orden que scipy (argsort por defecto, recorrido de mayor a menor)
+    # para que los empates de altura elijan el mismo pico.
+    keep = np.ones(peaks.size, dtype=bool)
+    for i in np.argsort(values[peaks])[::-1]:
+        if not keep[i]:
+            continue
+        lo = np.searchsorted(peaks, peaks[i] - distance, side="right")
+        hi = np.searchsorted(peaks, peaks[i] + distance, side="left")
+        keep[lo:hi] = False
+        keep[i] = True
+    return peaks[keep]
+
 
 class HighlightDetector:
     """
@@ -35,6 +225,32 @@ class HighlightDetector:
         # Accede a 'keywords' directamente desde detection_config
         self.general_keywords = self.detection_config.keywords
         self.streamer_keywords_map = self.detection_config.streamer_keywords
+        # Keywords combinadas y ya en minúsculas, precalculadas por streamer
+        self._combined_lower_default: list[tuple[str, float]] = [
+            (keyword.lower(), weight)
+            for keyword, weight in self.general_keywords.items()
+        ]
+        self._combined_lower: dict[str, list[tuple[str, float]]] = {}
+        for name, specific_keywords in self.streamer_keywords_map.items():
+            combined_keywords = {**self.general_keywords, **specific_keywords}
+            self._combined_lower[name] = [
+                (keyword.lower(), weight)
+                for keyword, weight in combined_keywords.items()
+            ]
+            logger.debug(
+                f"Palabras clave combinadas para {name}: {list(combined_keywords.keys())}"
+            )
+        # Autómatas de keywords por streamer (se construyen en el primer uso)
+        self._ac_cache: dict[Optional[str], ahocorasick.Automaton] = {}
+        # Funciones de score para listas pequeñas (None = keywords generales)
+        self._keyword_scorers = {
+            cache_key: _make_keyword_scorer(keywords)
+            for cache_key, keywords in [
+                (None, self._combined_lower_default),
+                *self._combined_lower.items(),
+            ]
+            if len(keywords) <= KEYWORD_SCORER_MAX
+        }
 
         # Y también es probable que necesites inicializar estos atributos desde la configuración
         # para que no fallen en otros lugares del código si se accede directamente a ellos.
@@ -45,6 +261,10 @@ class HighlightDetector:
         # Fuera de la llamada _calculate_keyword_score, deberías inicializarlos aquí.
         # Por ahora, solo se usan en `find_highlights`, donde se acceden correctamente.
 
+        # Compilar (o cargar de caché) el kernel Numba ahora y no en el primer VOD
+        if numpy_rms is None and _rms_windows is not None:
+            _rms_windows(np.zeros(1, np.float32), 1)
+
         logger.info(
             f"HighlightDetector inicializado con umbral de hype: {self.detection_config.hype_score_threshold}"
         )
@@ -62,57 +282,251 @@ class HighlightDetector:
         Extrae un pequeño segmento del archivo de audio principal a un archivo temporal.
         Guarda el segmento en el 'temp_dir' especificado.
         """
-        segment_path = temp_dir / f"temp_segment_{start:.0f}_{end:.0f}.wav"
-        args = [
-            "ffmpeg",
-            "-y",
-            "-i",
-            str(main_audio_path),
-            "-ss",
-            str(start),
-            "-to",
-            str(end),
-            "-c",
-            "copy",
-            str(segment_path),
-        ]
-        process = await asyncio.create_subprocess_exec(
-            *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-        )
-        stdout, stderr = await process.communicate()
-        if process.returncode != 0:
+        # Nombre único: dos picos que redondean al mismo segundo no deben colisionar
+        with tempfile.NamedTemporaryFile(
+            prefix="temp_segment_", suffix=".wav", dir=temp_dir, delete=False
+        ) as tmp:
+            segment_path = Path(tmp.name)
+        try:
+            # Recorte en proceso con soundfile: evita lanzar un ffmpeg por candidato
+            await asyncio.to_thread(
+                self._write_audio_segment, main_audio_path, start, end, segment_path
+            )
+        except AUDIO_DECODE_ERRORS as e:
             logger.error(
-                f"No se pudo extraer el segmento de audio: {segment_path}. "
-                f"FFmpeg Error: {stderr.decode().strip()}"
+                f"No se pudo extraer el segmento de audio: {segment_path}. Error: {e}"
             )
+            segment_path.unlink(missing_ok=True)
             return None
         return segment_path
 
-    async def _calculate_rms(self, audio_path: str, window_sec=1.0) -> np.ndarray:
-        """Calcula la energía RMS (Root Mean Square) en ventanas de tiempo."""
+    @staticmethod
+    def supports_direct_decode(media_path: Path) -> bool:
+        """
+        True si el detector puede decodificar el contenedor (mp4, ts...) con PyAV,
+        sin que haga falta extraer antes un WAV con ffmpeg.
+        """
+        return av is not None and Path(media_path).suffix.lower() != ".wav"
+
+    @staticmethod
+    def _iter_av_pcm(media_path: Path, start: float = 0.0):
+        """
+        Decodifica en streaming el primer stream de audio con PyAV como bloques
+        float32 mono a 16 kHz. Produce tuplas (segundo de inicio, muestras).
+        """
+        with av.open(str(media_path)) as container:
+            stream = container.streams.audio[0]
+            origin = (
+                float(stream.start_time * stream.time_base)
+                if stream.start_time is not None
+                else 0.0
+            )
+            if start > 0:
+                container.seek(int((origin + start) / stream.time_base), stream=stream)
+            resampler = av.AudioResampler(
+                format="flt", layout="mono", rate=WHISPER_SAMPLE_RATE
+            )
+            position = None
+            for frame in container.decode(stream):
+                if position is None:
+                    position = frame.time - origin if frame.time is not None else 0.0
+                for resampled in resampler.resample(frame):
+                    samples = resampled.to_ndarray()[0]
+                    yield position, samples
+                    position += len(samples) / WHISPER_SAMPLE_RATE
+            for resampled in resampler.resample(None):
+                yield position or 0.0, resampled.to_ndarray()[0]
+
+    @classmethod
+    def _read_av_range(cls, media_path: Path, start: float, end: float) -> np.ndarray:
+        """Decodifica solo el rango [start, end) del contenedor (16 kHz, float32)."""
+        pieces = []
+        for position, samples in cls._iter_av_pcm(media_path, start):
+            first = max(0, round((start - position) * WHISPER_SAMPLE_RATE))
+            last = min(len(samples), round((end - position) * WHISPER_SAMPLE_RATE))
+            if last > first:
+                pieces.append(samples[first:last])
+            if position + len(samples) / WHISPER_SAMPLE_RATE >= end:
+                break
+        return np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+
+    @classmethod
+    def decode_audio(cls, media_path: Path) -> np.ndarray:
+        """Decodifica todo el audio del contenedor con PyAV (16 kHz, float32)."""
+        return cls._read_av_range(media_path, 0.0, math.inf)
+
+    @classmethod
+    def _read_audio_ranges(
+        cls, main_audio_path: Path, ranges: list[tuple[float, float]]
+    ) -> tuple[list[np.ndarray], int]:
+        """
+        Lee los rangos [start, end) del WAV principal como float32 mono, abriendo
+        y parseando el archivo una sola vez para todos ellos.
+        También acepta el PCM ya en memoria (float32 mono a 16 kHz).
+        """
+        if isinstance(main_audio_path, np.ndarray):
+            pcm = main_audio_path
+            segments = [
+                pcm[int(start * WHISPER_SAMPLE_RATE) : int(end * WHISPER_SAMPLE_RATE)]
+                for start, end in ranges
+            ]
+            return segments, WHISPER_SAMPLE_RATE
+
+        if cls.supports_direct_decode(main_audio_path):
+            segments = [
+                cls._read_av_range(main_audio_path, start, end) for start, end in ranges
+            ]
+            return segments, WHISPER_SAMPLE_RATE
+
+        mapped = _map_wav_pcm(main_audio_path)
+        if mapped is not None:
+            # Vistas del WAV proyectado: solo se tocan las páginas de cada rango
+            pcm, sample_rate = mapped
+            segments = []
+            for start, end in ranges:
+                first = min(int(start * sample_rate), len(pcm))
+                block = pcm[first : first + int((end - start) * sample_rate)]
+                segments.append(_pcm_to_mono_float32(block))
+            return segments, sample_rate
+
+        segments = []
+        with sf.SoundFile(main_audio_path) as f:
+            sample_rate = f.samplerate
+            for start, end in ranges:
+                f.seek(min(int(start * sample_rate), f.frames))
+                segment = f.read(int((end - start) * sample_rate), dtype="float32")
+                if segment.ndim > 1:
+                    segment = segment.mean(axis=1, dtype=np.float32)
+                segments.append(segment)
+        return segments, sample_rate
+
+    @classmethod
+    def _read_audio_range(
+        cls, main_audio_path: Path, start: float, end: float
+    ) -> tuple[np.ndarray, int]:
+        """Lee solo el rango [start, end) del WAV principal como float32."""
+        segments, sample_rate = cls._read_audio_ranges(main_audio_path, [(start, end)])
+        return segments[0], sample_rate
+
+    @classmethod
+    def _write_audio_segment(
+        cls, main_audio_path: Path, start: float, end: float, segment_path: Path
+    ) -> None:
+        """Escribe el rango [start, end) del WAV principal a segment_path."""
+        segment, sample_rate = cls._read_audio_range(main_audio_path, start, end)
+        sf.write(segment_path, segment, sample_rate, subtype="PCM_16")
+
+    async def _calculate_rms(
+        self, audio_path: str, window_sec=RMS_WINDOW_SECONDS
+    ) -> np.ndarray:
+        """
+        Calcula la energía RMS (Root Mean Square) en ventanas de tiempo.
+        La decodificación y la reducción corren en un hilo para no bloquear el bucle.
+        """
+        return await asyncio.to_thread(self._calculate_rms_sync, audio_path, window_sec)
+
+    def _calculate_rms_sync(self, audio_path: str, window_sec: float) -> np.ndarray:
+        """
+        Núcleo síncrono de `_calculate_rms`.
+        Lee el audio por bloques para no cargar el archivo completo en memoria.
+        """
+        if isinstance(audio_path, np.ndarray):
+            logger.info("Calculando energía RMS del PCM en memoria con numpy...")
+            window_size = int(WHISPER_SAMPLE_RATE * window_sec)
+            if len(audio_path) < window_size:
+                return np.array([])
+            return np.asarray(_rms_of_windows(audio_path, window_size), np.float32)
+
+        if self.supports_direct_decode(audio_path):
+            logger.info("Calculando energía RMS del audio con PyAV/numpy...")
+            try:
+                return self._calculate_rms_av(audio_path, window_sec)
+            except AUDIO_DECODE_ERRORS as e:
+                logger.error(f"No se pudo decodificar el audio con PyAV: {e}")
+                return np.array([])
+
+        mapped = _map_wav_pcm(audio_path)
+        if mapped is not None:
+            logger.info(
+                "Calculando energía RMS del WAV proyectado en memoria (mmap)..."
+            )
+            pcm, sample_rate = mapped
+            window_size = int(sample_rate * window_sec)
+            num_windows = len(pcm) // window_size
+            if num_windows == 0:
+                return np.array([])
+            block_size = max(1, RMS_BLOCK_SAMPLES // window_size) * window_size
+            return self._rms_from_blocks(
+                (
+                    pcm[i : i + block_size]
+                    for i in range(0, num_windows * window_size, block_size)
+                ),
+                num_windows,
+                window_size,
+            )
+
         logger.info("Calculando energía RMS del audio con soundfile/numpy...")
         try:
-            audio_data, sample_rate = sf.read(audio_path)
+            with sf.SoundFile(audio_path) as f:
+                window_size = int(f.samplerate * window_sec)
+                num_windows = f.frames // window_size
+                if num_windows == 0:
+                    return np.array([])
+
+                windows_per_block = max(1, RMS_BLOCK_SAMPLES // window_size)
+                blocks = f.blocks(
+                    blocksize=windows_per_block * window_size,
+                    frames=num_windows * window_size,
+                    dtype="float32",
+                    always_2d=True,
+                )
+                return self._rms_from_blocks(blocks, num_windows, window_size)
         except Exception as e:
             logger.error(f"No se pudo leer el archivo de audio con soundfile: {e}")
             return np.array([])
-        if audio_data.ndim > 1:
-            audio_data = audio_data.mean(axis=1)
 
-        window_size = int(sample_rate * window_sec)
-        num_windows = len(audio_data) // window_size
-        if num_windows == 0:
-            return np.array([])
+    @staticmethod
+    def _rms_from_blocks(blocks, num_windows: int, window_size: int) -> np.ndarray:
+        """Reduce bloques (frames, canales) de ventanas completas a su RMS."""
+        rms_values = np.empty(num_windows, dtype=np.float32)
+        offset = 0
+        for block in blocks:
+            # Bajar a mono (float32) y reducir solo este bloque
+            block_rms = _rms_of_windows(_pcm_to_mono_float32(block), window_size)
+            rms_values[offset : offset + block_rms.size] = block_rms
+            offset += block_rms.size
+        return rms_values
 
-        rms_values = [
-            np.sqrt(np.mean(audio_data[i * window_size : (i + 1) * window_size] ** 2))
-            for i in range(num_windows)
-        ]
-        return np.array(rms_values)
+    def _calculate_rms_av(self, media_path: str, window_sec: float) -> np.ndarray:
+        """RMS por ventanas decodificando el contenedor en streaming con PyAV."""
+        window_size = int(WHISPER_SAMPLE_RATE * window_sec)
+        rms_blocks: list[np.ndarray] = []
+        pending: list[np.ndarray] = []
+        pending_len = 0
+
+        def _reduce_pending() -> None:
+            nonlocal pending, pending_len
+            data = np.concatenate(pending)
+            usable = len(data) // window_size * window_size
+            if usable:
+                rms_blocks.append(_rms_of_windows(data[:usable], window_size))
+            pending, pending_len = [data[usable:]], len(data) - usable
+
+        for _, samples in self._iter_av_pcm(media_path):
+            pending.append(samples)
+            pending_len += len(samples)
+            if pending_len >= RMS_BLOCK_SAMPLES:
+                _reduce_pending()
+        if pending:
+            _reduce_pending()
+
+        if not rms_blocks:
+            return np.array([])
+        return np.concatenate(rms_blocks).astype(np.float32, copy=False)
 
     async def find_highlights(
         self,
-        audio_path: Path,
+        audio_path: Union[Path, np.ndarray],
         video_duration_sec: float,
         streamer_name: str,
         temp_dir: Path,  # temp_dir ahora es un argumento necesario
@@ -122,7 +536,10 @@ class HighlightDetector:
         )
 
         # --- PASO 1: Análisis Rápido de Energía en todo el audio ---
-        rms_scores = await self._calculate_rms(str(audio_path))
+        rms_scores = await self._calculate_rms(
+            audio_path if isinstance(audio_path, np.ndarray) else str(audio_path),
+            RMS_WINDOW_SECONDS,
+        )
         if rms_scores.size == 0:
             logger.warning("No se pudo calcular el score RMS. Abortando detección.")
             return []
@@ -132,16 +549,23 @@ class HighlightDetector:
             logger.warning("Audio sin variación de energía significativa.")
             return []
 
-        normalized_rms = (rms_scores - rms_min) / (rms_max - rms_min)
+        # Normalización in situ: el array RMS es nuestro y así no hay temporales
+        normalized_rms = rms_scores
+        np.subtract(normalized_rms, rms_min, out=normalized_rms)
+        normalized_rms /= rms_max - rms_min
 
         # --- PASO 2: Encontrar Picos de Energía (Candidatos a Highlight) ---
-        candidate_peaks, _ = find_peaks(
+        # Los picos se buscan en índices de la serie RMS, no en segundos
+        clip_duration = self.detection_config.clip_duration_seconds
+        distance_windows = max(1, round(clip_duration / RMS_WINDOW_SECONDS))
+        candidate_peaks = await asyncio.to_thread(
+            _find_rms_peaks,
             normalized_rms,
-            height=self.detection_config.rms_peak_threshold,
-            distance=self.detection_config.clip_duration_seconds,
+            self.detection_config.rms_peak_threshold,
+            distance_windows,
         )
 
-        if not candidate_peaks.any():
+        if candidate_peaks.size == 0:
             logger.warning("No se encontraron picos de energía que superen el umbral.")
             return []
 
@@ -150,91 +574,252 @@ class HighlightDetector:
         )
 
         # --- PASO 3: Análisis Enfocado - Transcribir solo los segmentos candidatos ---
+        centers = candidate_peaks * RMS_WINDOW_SECONDS
+        starts = np.clip(centers - clip_duration / 2, 0, None)
+        ends = np.minimum(centers + clip_duration / 2, video_duration_sec)
+        candidate_ranges = list(
+            zip(candidate_peaks.tolist(), starts.tolist(), ends.tolist())
+        )
+
         candidate_highlights = []
-        for peak_idx in candidate_peaks:
-            center_timestamp = peak_idx
-            start_time = max(
-                0, center_timestamp - self.detection_config.clip_duration_seconds / 2
-            )
-            end_time = min(
-                video_duration_sec,
-                center_timestamp + self.detection_config.clip_duration_seconds / 2,
+        if self._can_transcribe_in_memory(audio_path):
+            # El PCM ya decodificado va directo a Whisper en una única llamada,
+            # sin WAV temporales que Whisper tendría que volver a decodificar
+            transcriptions = await self._transcribe_batch(
+                audio_path, [(start, end) for _, start, end in candidate_ranges]
             )
-
-            segment_audio_path: Optional[Path] = None
-            try:
-                segment_audio_path = await self._extract_audio_segment(
-                    audio_path,
+            for (peak_idx, start_time, end_time), transcription in zip(
+                candidate_ranges, transcriptions
+            ):
+                highlight = self._score_candidate(
+                    normalized_rms[peak_idx],
                     start_time,
                     end_time,
-                    temp_dir,  # Pasa temp_dir aquí
+                    transcription,
+                    streamer_name,
                 )
-                if not segment_audio_path:
-                    continue
+                if highlight:
+                    candidate_highlights.append(highlight)
+        else:
+            # Extracción + transcripción concurrentes, acotadas por un semáforo
+            semaphore = asyncio.Semaphore(
+                max(1, getattr(self.detection_config, "parallel_transcriptions", 2))
+            )
 
-                # El método `transcribe` del Transcriber devuelve un diccionario
-                transcription = await self.transcriber.transcribe(segment_audio_path)
-                segment_text = transcription.text
-                logger.debug(f"Texto del segmento transcrito: '{segment_text}'")
+            async def _process_candidate(
+                peak_idx: int, start_time: float, end_time: float
+            ) -> Optional[dict]:
+                async with semaphore:
+                    segment_audio_path: Optional[Path] = None
+                    try:
+                        segment_audio_path = await self._extract_audio_segment(
+                            audio_path,
+                            start_time,
+                            end_time,
+                            temp_dir,  # Pasa temp_dir aquí
+                        )
+                        if not segment_audio_path:
+                            return None
 
-                keyword_score = self._calculate_keyword_score(
-                    segment_text, streamer_name
-                )
+                        # El método `transcribe` del Transcriber devuelve un TranscriptionResult
+                        transcription = await self.transcriber.transcribe(
+                            segment_audio_path
+                        )
+                        return self._score_candidate(
+                            normalized_rms[peak_idx],
+                            start_time,
+                            end_time,
+                            transcription,
+                            streamer_name,
+                        )
 
-                final_hype_score = (
-                    normalized_rms[peak_idx] * self.detection_config.scoring.rms_weight
-                    + keyword_score * self.detection_config.scoring.keyword_weight
-                )
+                    finally:
+                        if segment_audio_path:
+                            try:
+                                segment_audio_path.unlink(missing_ok=True)
+                                logger.debug(
+                                    f"Limpiado segmento de audio temporal: {segment_audio_path.name}"
+                                )
+                            except OSError as e:
+                                logger.warning(
+                                    f"No se pudo eliminar el archivo temporal {segment_audio_path.name}: {e}"
+                                )
 
-                if final_hype_score >= self.detection_config.hype_score_threshold:
-                    candidate_highlights.append(
-                        {
-                            "start_time": start_time,
-                            "end_time": end_time,
-                            "transcription": transcription,  # <-- DEVOLVER TRANSCRIPCIÓN
-                            "score": final_hype_score,
-                            "text": segment_text,
-                        }
-                    )
-                    logger.success(
-                        f"Candidato Confirmado! Score: {final_hype_score:.2f}, Tiempo: {start_time:.2f}s - {end_time:.2f}s, Keywords: {keyword_score:.2f}"
+            results = await asyncio.gather(
+                *(_process_candidate(*r) for r in candidate_ranges),
+                return_exceptions=True,
+            )
+            # gather preserva el orden de los candidatos
+            for result in results:
+                if isinstance(result, BaseException):
+                    logger.error(
+                        f"Fallo al analizar un candidato a highlight: {result}"
                     )
-
-            finally:
-                if segment_audio_path and segment_audio_path.exists():
-                    try:
-                        os.remove(segment_audio_path)
-                        logger.debug(
-                            f"Limpiado segmento de audio temporal: {segment_audio_path.name}"
-                        )
-                    except OSError as e:
-                        logger.warning(
-                            f"No se pudo eliminar el archivo temporal {segment_audio_path.name}: {e}"
-                        )
+                elif result:
+                    candidate_highlights.append(result)
 
         logger.info(
             f"Se confirmaron {len(candidate_highlights)} highlights tras el análisis de palabras clave para {streamer_name}."
         )
-        return sorted(candidate_highlights, key=lambda x: x["score"], reverse=True)[
-            : self.detection_config.max_clips_per_vod
-        ]
+        # Solo interesan los k mejores: un heap de tamaño k en vez de ordenar todo
+        return heapq.nlargest(
+            self.detection_config.max_clips_per_vod,
+            candidate_highlights,
+            key=lambda x: x["score"],
+        )
 
-    def _calculate_keyword_score(self, text_segment: str, streamer_name: str) -> float:
-        score = 0.0
-        current_streamer_specific_keywords = self.streamer_keywords_map.get(
-            streamer_name, {}
+    def _score_candidate(
+        self,
+        rms_value: float,
+        start_time: float,
+        end_time: float,
+        transcription: TranscriptionResult,
+        streamer_name: str,
+    ) -> Optional[dict]:
+        """Combina energía y keywords; devuelve el highlight si supera el umbral."""
+        segment_text = transcription.text
+        logger.debug(f"Texto del segmento transcrito: '{segment_text}'")
+
+        keyword_score = self._calculate_keyword_score(segment_text, streamer_name)
+
+        final_hype_score = (
+            rms_value * self.detection_config.scoring.rms_weight
+            + keyword_score * self.detection_config.scoring.keyword_weight
         )
-        combined_keywords = {
-            **self.general_keywords,
-            **current_streamer_specific_keywords,
+
+        if final_hype_score < self.detection_config.hype_score_threshold:
+            return None
+
+        logger.success(
+            f"Candidato Confirmado! Score: {final_hype_score:.2f}, Tiempo: {start_time:.2f}s - {end_time:.2f}s, Keywords: {keyword_score:.2f}"
+        )
+        return {
+            "start_time": start_time,
+            "end_time": end_time,
+            "transcription": transcription,  # <-- DEVOLVER TRANSCRIPCIÓN
+            "score": final_hype_score,
+            "text": segment_text,
         }
-        logger.debug(
-            f"Palabras clave combinadas para {streamer_name}: {list(combined_keywords.keys())}"
+
+    def _can_transcribe_in_memory(self, audio_path: Union[Path, np.ndarray]) -> bool:
+        """
+        Whisper solo acepta arrays a su frecuencia nativa (16 kHz), que es la que
+        produce `_extract_audio_pcm`; otros audios pasan por segmentos temporales.
+        """
+        if isinstance(audio_path, np.ndarray):
+            return True
+        if self.supports_direct_decode(audio_path):
+            return True  # PyAV ya remuestrea a 16 kHz
+        try:
+            return sf.info(str(audio_path)).samplerate == WHISPER_SAMPLE_RATE
+        except AUDIO_DECODE_ERRORS as e:
+            logger.debug(
+                f"No se pudo leer la cabecera de {audio_path}: {e}. "
+                "Se transcribirá por segmentos temporales."
+            )
+            return False
+
+    async def _transcribe_batch(
+        self, audio_path: Union[Path, np.ndarray], ranges: list[tuple[float, float]]
+    ) -> list[TranscriptionResult]:
+        """
+        Concatena los segmentos candidatos (separados por silencio) y los transcribe
+        en una sola llamada. Los segmentos devueltos se reparten por su punto medio y
+        sus tiempos quedan relativos al inicio de cada candidato.
+        """
+        slices, _ = await asyncio.to_thread(self._read_audio_ranges, audio_path, ranges)
+        pad = np.zeros(
+            int(BATCH_SILENCE_PAD_SECONDS * WHISPER_SAMPLE_RATE), dtype=np.float32
         )
-        for keyword, weight in combined_keywords.items():
-            if keyword.lower() in text_segment.lower():
-                score += weight
+        pieces = [pad]
+        offsets = []  # (inicio, fin) en segundos de cada candidato dentro del lote
+        position = len(pad)
+        for segment in slices:
+            offsets.append(
+                (
+                    position / WHISPER_SAMPLE_RATE,
+                    (position + len(segment)) / WHISPER_SAMPLE_RATE,
+                )
+            )
+            pieces.extend((segment, pad))
+            position += len(segment) + len(pad)
+
+        batch_result = await self.transcriber.transcribe(np.concatenate(pieces))
+
+        starts = np.array([start for start, _ in offsets])
+        per_candidate: list[list[dict]] = [[] for _ in ranges]
+        for segment in batch_result.segments:
+            midpoint = (segment["start"] + segment["end"]) / 2
+            idx = max(0, int(np.searchsorted(starts, midpoint, side="right")) - 1)
+            seg_start, seg_end = offsets[idx]
+            per_candidate[idx].append(
+                {
+                    **segment,
+                    "start": max(0.0, segment["start"] - seg_start),
+                    "end": min(seg_end - seg_start, segment["end"] - seg_start),
+                }
+            )
+
+        return [
+            TranscriptionResult(
+                text=" ".join(seg["text"] for seg in segments),
+                segments=segments,
+                language=batch_result.language,
+            )
+            for segments in per_candidate
+        ]
+
+    def _get_keyword_automaton(
+        self, cache_key: Optional[str], keywords: list[tuple[str, float]]
+    ) -> "ahocorasick.Automaton":
+        """Devuelve (y cachea) el autómata Aho-Corasick de keywords del streamer."""
+        automaton = self._ac_cache.get(cache_key)
+        if automaton is None:
+            grouped: dict[str, list[float]] = {}
+            for keyword_lower, weight in keywords:
+                grouped.setdefault(keyword_lower, []).append(weight)
+            automaton = ahocorasick.Automaton()
+            for keyword_lower, weights in grouped.items():
+                automaton.add_word(keyword_lower, (keyword_lower, tuple(weights)))
+            automaton.make_automaton()
+            self._ac_cache[cache_key] = automaton
+        return automaton
+
+    def _calculate_keyword_score(self, text_segment: str, streamer_name: str) -> float:
+        score = 0.0
+        # Streamers sin keywords propias comparten la lista (y el autómata) general
+        cache_key = streamer_name if streamer_name in self._combined_lower else None
+        keywords = self._combined_lower.get(streamer_name, self._combined_lower_default)
+        text_lower = text_segment.lower()
+        scorer = self._keyword_scorers.get(cache_key)
+        if scorer is not None:
+            score = scorer(text_lower)
+            if score:
                 logger.debug(
-                    f"Keyword '{keyword}' encontrada en '{text_segment}'. Score +{weight} = {score}"
+                    f"Keywords encontradas en '{text_segment}'. Score = {score}"
                 )
+            return score
+        if ahocorasick is not None and keywords:
+            # Una pasada lineal sobre el texto; cada keyword puntúa una sola vez
+            automaton = self._get_keyword_automaton(cache_key, keywords)
+            found = {
+                keyword_lower: weights
+                for _, (keyword_lower, weights) in automaton.iter(text_lower)
+            }
+            matches = [
+                (keyword_lower, weight)
+                for keyword_lower, weights in found.items()
+                for weight in weights
+            ]
+        else:
+            matches = [
+                (keyword_lower, weight)
+                for keyword_lower, weight in keywords
+                if keyword_lower in text_lower
+            ]
+        for keyword, weight in matches:
+            score += weight
+            logger.debug(
+                f"Keyword '{keyword}' encontrada en '{text_segment}'. Score +{weight} = {score}"
+            )
         return score
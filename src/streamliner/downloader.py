@@ -8,6 +8,7 @@ from datetime import datetime
 from loguru import logger
 
 from .config import AppConfig
+from .ffmpeg_io import run_ffmpeg
 
 
 class VideoDownloader:
@@ -119,13 +120,13 @@ class VideoDownloader:
             logger.debug(
                 f"Ejecutando ffmpeg para descargar: {' '.join(ffmpeg_command)}"
             )
-            process_download = await asyncio.create_subprocess_exec(
-                *ffmpeg_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            # FFmpeg descarga directamente desde la URL al archivo; solo leemos stderr
+            # Una descarga larga emite horas de estadísticas: solo se guarda la cola
+            returncode, error_output = await run_ffmpeg(
+                ffmpeg_command, f"ffmpeg descarga {output_path.name}"
             )
-            stdout_download, stderr_download = await process_download.communicate()
 
-            if process_download.returncode != 0:
-                error_output = stderr_download.decode().strip()
+            if returncode != 0:
                 logger.error(
                     f"Error al descargar el VOD con ffmpeg {url}: {error_output}"
                 )
@@ -0,0 +1,42 @@
+# src/streamliner/ffmpeg_io.py
+
+import asyncio
+
+from loguru import logger
+
+# Bloque de lectura de stderr de ffmpeg y cola conservada para reportar errores
+STDERR_READ_BYTES = 1 << 16
+STDERR_TAIL_BYTES = 1 << 14
+
+
+async def drain_stderr(stream: asyncio.StreamReader, label: str) -> bytes:
+    """
+    Consume el stderr de un proceso en bloques de 64 KB (un despertar del bucle por
+    bloque, no por línea) y devuelve solo su cola. El log DEBUG es perezoso: si el
+    nivel no está activo, el bloque ni siquiera se decodifica.
+    """
+    tail = bytearray()
+    while data := await stream.read(STDERR_READ_BYTES):
+        logger.opt(lazy=True).debug(
+            "[{}] {}", lambda: label, lambda: data.decode(errors="ignore").rstrip()
+        )
+        tail += data
+        del tail[:-STDERR_TAIL_BYTES]
+    return bytes(tail)
+
+
+async def run_ffmpeg(args: list[str], label: str, **kwargs) -> tuple[int, str]:
+    """
+    Ejecuta ffmpeg cuando su stdout no interesa: stdout va a DEVNULL y del stderr
+    solo se conserva la cola para el mensaje de error. Devuelve (código, cola).
+    """
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+        **kwargs,
+    )
+    stderr_tail, _ = await asyncio.gather(
+        drain_stderr(process.stderr, label), process.wait()
+    )
+    return process.returncode, stderr_tail.decode(errors="ignore").strip()
@@ -1,22 +1,31 @@
 # src/streamliner/monitor.py
 
 import asyncio
-import sys
 from urllib.parse import urlparse
 import subprocess
 import asyncio.subprocess
-import json
 import shutil
+import threading
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
 
 from loguru import logger
+from streamlink import Streamlink
+from streamlink.exceptions import NoPluginError, PluginError
 
 from .config import AppConfig
+from .ffmpeg_io import drain_stderr
+from .pipeline import PipelineContext
+from .publisher.tiktok import close_upload_client
 from .worker import ProcessingWorker
 from .storage import get_storage
 
+# Separación mínima entre dos ciclos de sondeo adelantados por eventos
+MIN_CHECK_GAP_SECONDS = 5
+# Ciclos sin nadie en vivo que suman un intervalo base extra al sondeo adaptativo
+IDLE_CYCLES_PER_STEP = 5
+
 
 class StreamMonitor:
     def __init__(self, config: AppConfig, dry_run: bool = False):
@@ -27,8 +36,19 @@ class StreamMonitor:
         self.chunk_duration_seconds = config.real_time_processing.chunk_duration_seconds
         self.chunk_storage_path = config.paths.chunks_dir
         self.storage_manager = get_storage(config)
-
-        for streamer_login in config.streamers:
+        # Evento "push": adelanta el siguiente ciclo de sondeo cuando algo cambia
+        self._wake_event = asyncio.Event()
+        # Componentes costosos compartidos por todos los workers (se crean al primer ONLINE)
+        self._pipeline_context: Optional[PipelineContext] = None
+        # Sesión de Streamlink (plugins y cliente HTTP) reutilizada entre sondeos.
+        # Los sondeos corren en hilos a la vez y la sesión no es thread-safe:
+        # cada hilo del executor tiene la suya.
+        self._streamlink_local = threading.local()
+        # Sin duplicados y en el orden del config: un streamer repetido lanzaría dos
+        # sondeos (y dos grabaciones) concurrentes sobre el mismo estado
+        self.streamers: tuple[str, ...] = tuple(dict.fromkeys(config.streamers))
+
+        for streamer_login in self.streamers:
             self.active_streams[streamer_login] = {
                 "worker": None,
                 "recording_task": None,  # La tarea de asyncio que contiene el bucle de grabación
@@ -46,54 +66,41 @@ class StreamMonitor:
             f"StreamMonitor inicializado. Chunks se guardarán en: {self.chunk_storage_path}"
         )
 
+    def _resolve_streams(self, url: str) -> dict:
+        """Resuelve los streams de `url` con la sesión de Streamlink del hilo actual."""
+        session = getattr(self._streamlink_local, "session", None)
+        if session is None:
+            session = self._streamlink_local.session = Streamlink()
+        return session.streams(url)
+
     async def _get_stream_info_with_streamlink(self, streamer_login: str):
         """
-        Obtiene información del stream usando streamlink --json.
-        Retorna el diccionario de información o None si no está en vivo o hay error.
+        Obtiene información del stream usando una sesión de Streamlink reutilizada.
+        Retorna un diccionario con la misma forma que `streamlink --json`
+        ({"streams": {"best": {"url": ...}}}) o None si no está en vivo o hay error.
         """
         kick_url = f"https://kick.com/{streamer_login}"
-        # Usar el intérprete actual para invocar streamlink como módulo, evitando depender del PATH
-        command = [
-            sys.executable,
-            "-m",
-            "streamlink",
-            "--json",
-            "--default-stream",
-            "best",
-            kick_url,
-        ]
 
         try:
-            logger.debug(
-                f"Ejecutando streamlink para {streamer_login}: {' '.join(command)}"
-            )
-            process = await asyncio.create_subprocess_exec(
-                *command, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
-
-            if process.returncode != 0:
-                error_output = stderr.decode().strip()
-                if "No streams found" in error_output:
-                    logger.debug(
-                        f"Streamlink: No se encontraron streams para {streamer_login}. Probablemente OFFLINE."
-                    )
-                    return None
-                logger.error(f"Error streamlink para {streamer_login}: {error_output}")
+            logger.debug(f"Consultando streamlink para {streamer_login}: {kick_url}")
+            # Resolución en proceso: sin lanzar un intérprete ni recargar plugins por sondeo
+            streams = await asyncio.to_thread(self._resolve_streams, kick_url)
+            best_stream = streams.get("best") if streams else None
+            if best_stream is None:
+                logger.debug(
+                    f"Streamlink: No se encontraron streams para {streamer_login}. Probablemente OFFLINE."
+                )
                 return None
 
-            info = json.loads(stdout.decode().strip())
-            return info
+            return {"url": kick_url, "streams": {"best": {"url": best_stream.to_url()}}}
 
-        except json.JSONDecodeError:
+        except NoPluginError:
             logger.error(
-                f"Error al decodificar la salida JSON de streamlink para {streamer_login}"
+                f"Streamlink no tiene un plugin para la URL de {streamer_login}: {kick_url}"
             )
             return None
-        except FileNotFoundError:
-            logger.error(
-                "Comando 'streamlink' no encontrado. Asegúrate de que Streamlink esté instalado y en tu PATH."
-            )
+        except PluginError as e:
+            logger.error(f"Error streamlink para {streamer_login}: {e}")
             return None
         except Exception as e:
             logger.error(
@@ -155,8 +162,10 @@ class StreamMonitor:
         ]
 
         try:
+            # FFmpeg lee el HLS y escribe el chunk por sí mismo: ningún byte del stream
+            # pasa por Python, así que su stdout (vacío) no necesita una pipe.
             ffmpeg_process = await asyncio.create_subprocess_exec(
-                *command, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+                *command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
             )
             return ffmpeg_process
         except FileNotFoundError:
@@ -214,13 +223,14 @@ class StreamMonitor:
                     )
                     break  # Salir del bucle si FFmpeg no se pudo iniciar
 
-                (
-                    stdout,
-                    stderr,
-                ) = await ffmpeg_process.communicate()  # Esperar a que termine
+                # Esperar a que termine sin acumular todo su stderr en memoria
+                stderr = await drain_stderr(
+                    ffmpeg_process.stderr, f"ffmpeg {streamer_login}"
+                )
+                await ffmpeg_process.wait()
 
                 if ffmpeg_process.returncode != 0:
-                    error_output = stderr.decode().strip()
+                    error_output = stderr.decode(errors="ignore").strip()
                     logger.error(
                         f"Error al grabar chunk para {streamer_login} (ffmpeg): {error_output}. "
                         "Intentando recuperar en el próximo ciclo de monitoreo."
@@ -228,20 +238,24 @@ class StreamMonitor:
                     # No rompemos el bucle aquí. El monitor principal detectará el problema
                     # y si la URL es inválida, reiniciará la grabación.
                     # Si el error es temporal, el siguiente chunk podría funcionar.
+                    # Pedir una comprobación inmediata en vez de esperar al intervalo.
+                    self.request_check()
+                    # El chunk parcial nunca llega al worker: no dejarlo en disco
+                    await self._discard_chunk(chunk_filepath)
                 else:
                     logger.success(
                         f"Chunk {stream_info['current_chunk_num']} grabado: {chunk_filepath}"
                     )
                     worker = stream_info["worker"]
                     if worker:
-                        # Desacoplar: no bloquear la grabación mientras se procesa
-                        asyncio.create_task(
-                            worker.add_chunk_for_processing(chunk_filepath)
-                        )
+                        # Desacoplar: la cola acotada del worker procesa en orden
+                        # sin bloquear la grabación
+                        await worker.submit_chunk(chunk_filepath)
                     else:
                         logger.error(
                             f"No hay worker activo para {streamer_login} al añadir chunk."
                         )
+                        await self._discard_chunk(chunk_filepath)
 
                 # No es necesario un sleep aquí. El bucle continuará tan pronto como ffmpeg termine.
 
@@ -266,6 +280,18 @@ class StreamMonitor:
         # para asegurar que se ejecute en el momento correcto.
         pass
 
+    @staticmethod
+    async def _discard_chunk(chunk_path: Path) -> None:
+        """
+        Borra un chunk que no se va a procesar. Los chunks válidos los borra el
+        worker al salir de su buffer, así el disco no crece con la duración del stream.
+        """
+        try:
+            await asyncio.to_thread(chunk_path.unlink, missing_ok=True)
+            logger.debug(f"Chunk descartado eliminado: {chunk_path.name}")
+        except OSError as e:
+            logger.warning(f"No se pudo eliminar el chunk {chunk_path.name}: {e}")
+
     async def _handle_stream_online(self, streamer_login: str, stream_url: str):
         """Inicia (o reinicia) la grabación y procesamiento para un streamer."""
         stream_info = self.active_streams[streamer_login]
@@ -331,11 +357,15 @@ class StreamMonitor:
 
             # Inicializar el worker para esta sesión
             # Inicializar el worker para esta sesión
+            if self._pipeline_context is None:
+                # Whisper y el publisher se cargan una vez y se comparten entre sesiones
+                self._pipeline_context = PipelineContext.from_config(self.config)
             stream_info["worker"] = ProcessingWorker(
                 self.config,
                 streamer_login,
                 stream_session_dir,
                 dry_run=self.dry_run,
+                context=self._pipeline_context,
             )
         else:  # Ya estaba online, pero la URL cambió o hubo un error en la grabación anterior
             logger.warning(
@@ -359,6 +389,8 @@ class StreamMonitor:
         stream_info["recording_task"] = (
             recording_task  # Almacenar la Tarea (no el proceso FFmpeg)
         )
+        # Si el bucle de grabación termina por su cuenta, re-sondear sin esperar
+        recording_task.add_done_callback(lambda _: self.request_check())
 
     async def _handle_stream_offline(self, streamer_login: str):
         """Detiene la grabación y procesa/limpia recursos para un streamer que se puso offline."""
@@ -444,8 +476,9 @@ class StreamMonitor:
                 # Esperar un poco antes de intentar la limpieza para asegurar que los handles estén liberados
                 await asyncio.sleep(0.5)
 
-                # shutil.rmtree es más robusto para eliminar directorios y su contenido
-                shutil.rmtree(stream_session_dir)
+                # shutil.rmtree es más robusto para eliminar directorios y su contenido;
+                # en un hilo para no bloquear el bucle de eventos
+                await asyncio.to_thread(shutil.rmtree, stream_session_dir)
                 logger.success(
                     f"Directorio de sesión {stream_session_dir} limpiado exitosamente."
                 )
@@ -475,17 +508,58 @@ class StreamMonitor:
     ):  # La función _cleanup_session_dir ya no es necesaria y puede ser eliminada.
         """Inicia el monitoreo de streams por polling."""
         logger.info("Iniciando monitoreo de streams por polling...")
+        idle_streak = 0
         try:
             while True:
+                was_live = [self.active_streams[s]["is_live"] for s in self.streamers]
                 tasks = []
-                for streamer_login in self.config.streamers:
+                for streamer_login in self.streamers:
                     tasks.append(self._monitor_single_streamer(streamer_login))
 
                 await asyncio.gather(*tasks)
-                await asyncio.sleep(self.config.monitoring.check_interval_seconds)
+                is_live = [self.active_streams[s]["is_live"] for s in self.streamers]
+                # Racha de ciclos tranquilos: nadie en vivo y ningún cambio de estado
+                if any(is_live) or is_live != was_live:
+                    idle_streak = 0
+                else:
+                    idle_streak += 1
+                await self._wait_for_next_check(self._next_check_delay(idle_streak))
         finally:
             await self.stop_monitoring()
 
+    def _next_check_delay(self, idle_streak: int) -> float:
+        """
+        Intervalo adaptativo: el base mientras haya actividad; cuanto más dura la
+        racha sin nadie en vivo, más se espacia el sondeo (hasta el máximo).
+        """
+        base = self.config.monitoring.check_interval_seconds
+        ceiling = getattr(self.config.monitoring, "max_check_interval_seconds", base)
+        delay = base * (1 + idle_streak / IDLE_CYCLES_PER_STEP)
+        return max(MIN_CHECK_GAP_SECONDS, min(delay, max(base, ceiling)))
+
+    def request_check(self) -> None:
+        """
+        Adelanta el siguiente ciclo de monitoreo. Lo usan los eventos internos
+        (fallo de ffmpeg, fin del bucle de grabación) o un notificador externo
+        para reaccionar al momento; el sondeo periódico queda como reconciliación.
+        """
+        self._wake_event.set()
+
+    async def _wait_for_next_check(self, timeout: float) -> None:
+        """Duerme hasta el próximo sondeo o hasta que se pida una comprobación."""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            await asyncio.wait_for(self._wake_event.wait(), timeout=timeout)
+            logger.debug("Comprobación de streams adelantada por un evento.")
+            # Separación mínima entre ciclos para no entrar en bucle si ffmpeg falla seguido
+            remaining = MIN_CHECK_GAP_SECONDS - (loop.time() - started)
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+        except asyncio.TimeoutError:
+            pass
+        self._wake_event.clear()
+
     async def _monitor_single_streamer(self, streamer_login: str):
         """Lógica para monitorear un único streamer."""
         try:
@@ -557,4 +631,8 @@ class StreamMonitor:
                 await self._handle_stream_offline(  # Esto cancelará la tarea y limpiará
                     streamer_login
                 )
+        if self._pipeline_context and self._pipeline_context.publish_queue:
+            # Terminar las subidas ya encoladas antes de cerrar el cliente HTTP
+            await self._pipeline_context.publish_queue.drain()
+        await close_upload_client()
         logger.info("Monitoreo de streams detenido y recursos liberados.")
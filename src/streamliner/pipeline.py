@@ -1,20 +1,105 @@
 # src/streamliner/pipeline.py
 import asyncio
 import os
+from dataclasses import dataclass, field
 from pathlib import Path
 from loguru import logger
 from typing import Optional, List
-import subprocess
 import aiofiles  # <--- IMPORT AIOFILES
+import numpy as np
 
 
 from .config import AppConfig
 from .stt import Transcriber
 from .cutter import VideoCutter
+from .ffmpeg_io import drain_stderr, run_ffmpeg
 from .render import VideoRenderer
 from .detector import HighlightDetector
 from .publisher.tiktok import TikTokPublisher
-from .storage import get_storage
+from .storage import BaseStorage, get_storage
+
+# Muestras PCM (16 kHz, s16le) leídas del pipe de ffmpeg por bloque: ~32 s
+PCM_READ_SAMPLES = 1 << 19
+
+
+class PublishQueue:
+    """
+    Cola de subidas en proceso: el render entrega el clip y sigue, y una tarea
+    consumidora lo publica en segundo plano. Así una subida lenta o atascada no
+    retiene el lock del worker ni bloquea la detección de nuevos directos.
+    Las subidas se hacen de una en una (respeta el cooldown del publisher).
+    """
+
+    def __init__(self, publisher: TikTokPublisher):
+        self.publisher = publisher
+        self._queue: asyncio.Queue[tuple[Path, str]] = asyncio.Queue()
+        self._consumer: Optional[asyncio.Task] = None
+
+    def enqueue(self, clip_path: Path, streamer_name: str) -> None:
+        """Encola un clip renderizado para subirlo; arranca el consumidor si hace falta."""
+        if self._consumer is None or self._consumer.done():
+            self._consumer = asyncio.create_task(self._consume())
+        self._queue.put_nowait((clip_path, streamer_name))
+        logger.info(
+            f"Clip {clip_path.name} encolado para subir ({self._queue.qsize()} pendientes)."
+        )
+
+    async def _consume(self) -> None:
+        while True:
+            clip_path, streamer_name = await self._queue.get()
+            try:
+                await _upload_rendered_clip(self.publisher, clip_path, streamer_name)
+            finally:
+                self._queue.task_done()
+
+    async def drain(self) -> None:
+        """Espera a que terminen las subidas pendientes y detiene el consumidor."""
+        if self._consumer is None:
+            return
+        await self._queue.join()
+        self._consumer.cancel()
+        try:
+            await self._consumer
+        except asyncio.CancelledError:
+            pass
+        self._consumer = None
+
+
+@dataclass
+class PipelineContext:
+    """
+    Componentes costosos del pipeline (modelo Whisper, clientes HTTP del publisher)
+    creados una sola vez por proceso y compartidos entre workers y clips.
+    """
+
+    transcriber: Transcriber
+    renderer: VideoRenderer
+    storage: BaseStorage
+    detector: HighlightDetector
+    publisher: Optional[TikTokPublisher] = None
+    publish_queue: Optional[PublishQueue] = None
+    # Serializa la detección (Whisper) entre workers: el modelo es uno solo
+    detection_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    @classmethod
+    def from_config(cls, config: AppConfig) -> "PipelineContext":
+        transcriber = Transcriber(
+            whisper_model=config.transcription.whisper_model,
+            device=config.transcription.device,
+            compute_type=config.transcription.compute_type,
+            data_dir=config.paths.transcriber_models_dir,
+            batch_size=getattr(config.transcription, "batch_size", 0),
+        )
+        storage = get_storage(config)
+        publisher = TikTokPublisher(config, storage) if config.publishing else None
+        return cls(
+            transcriber=transcriber,
+            renderer=VideoRenderer(config.rendering),
+            storage=storage,
+            detector=HighlightDetector(config.detection, transcriber),
+            publisher=publisher,
+            publish_queue=PublishQueue(publisher) if publisher else None,
+        )
 
 
 # ==============================================================================
@@ -31,73 +116,65 @@ async def process_single_file(
     video_path = Path(video_path_str)
     logger.info(f"--- Iniciando pipeline de VOD para: {video_path} ---")
 
-    # Inicializar componentes (alineado con la firma actual)
-    transcriber = Transcriber(
-        whisper_model=config.transcription.whisper_model,
-        device=config.transcription.device,
-        compute_type=config.transcription.compute_type,
-        data_dir=config.paths.transcriber_models_dir,
+    # Inicializar componentes una sola vez para todos los highlights del VOD
+    context = PipelineContext.from_config(config)
+    transcriber = context.transcriber
+    detector = context.detector
+
+    # 1. Extraer audio completo del VOD (solo si el detector no puede leer el
+    # contenedor directamente con PyAV); el PCM queda en memoria, sin WAV
+    if HighlightDetector.supports_direct_decode(video_path):
+        detection_input = video_path
+    else:
+        detection_input = await _extract_audio_pcm(video_path)
+
+    # 2. Detectar highlights
+    highlights = await detector.find_highlights(
+        audio_path=detection_input,
+        video_duration_sec=await _get_video_duration(video_path),
+        streamer_name=streamer_name,
+        temp_dir=config.paths.data_dir,  # Directorio temporal para archivos del detector
     )
-    detector = HighlightDetector(config.detection, transcriber)
-    cutter = VideoCutter(config.paths.clips_dir)  # Cutter para cortar del VOD original
+    del detection_input  # Liberar el PCM en memoria (si lo hubo) antes de renderizar
 
-    # Variables para almacenar rutas de archivos a limpiar
-    audio_to_clean: Optional[Path] = None
-    cut_clips_to_clean: List[Path] = []
+    if not highlights:
+        logger.info("No se encontraron highlights en el VOD. Saliendo.")
+        return
 
-    try:
-        # 1. Extraer audio completo del VOD
-        # Usamos config.paths.data_dir como temp_dir para el audio del VOD
-        audio_to_clean = await _extract_audio(video_path, config.paths.data_dir)
-
-        # 2. Detectar highlights
-        highlights = await detector.find_highlights(
-            audio_path=audio_to_clean,
-            video_duration_sec=await _get_video_duration(video_path),
-            streamer_name=streamer_name,
-            temp_dir=config.paths.data_dir,  # Directorio temporal para archivos del detector
-        )
+    # Corte + render de cada highlight en paralelo, acotado por un semáforo
+    semaphore = asyncio.Semaphore(
+        max(1, getattr(config.detection, "max_parallel_clips", 2))
+    )
 
-        if not highlights:
-            logger.info("No se encontraron highlights en el VOD. Saliendo.")
-            return
+    # La transcripción del detector no trae tiempos por palabra: en modo karaoke
+    # cada clip se vuelve a transcribir (con word_timestamps) tras cortarlo
+    reuse_transcription = (
+        getattr(config.rendering, "subtitle_mode", "plain") != "karaoke"
+    )
 
-        for i, highlight in enumerate(highlights):
+    async def _process_highlight(i: int, highlight: dict) -> None:
+        async with semaphore:
             logger.info(
                 f"--- Procesando Highlight #{i + 1}/{len(highlights)} (Score: {highlight['score']:.2f}) ---"
             )
 
-            # 3. Cortar el video original para obtener el clip
-            # El nombre del archivo cortado usará el nombre del VOD original
-            output_filename_str = f"{video_path.stem}_highlight_{i + 1}.mp4"
-            cut_clip_path = await cutter.cut_clip(
-                video_path,  # VOD completo como input
-                start_time=highlight[
-                    "start_time"
-                ],  # Asegúrate de que detector devuelva 'start_time' y 'end_time'
-                end_time=highlight[
-                    "end_time"
-                ],  # en lugar de 'start' y 'end'. Esto es una suposición.
-                output_filename=output_filename_str,
-            )
-            cut_clips_to_clean.append(cut_clip_path)
-
-            # 4. Procesar y crear el clip final (transcripción, renderizado, subida)
-            # Pasamos el clip_path ya cortado, y el start_time/end_time no son necesarios aquí
-            # Crear un publisher si la sección está habilitada
-            publisher = (
-                TikTokPublisher(config, get_storage(config))
-                if config.publishing
-                else None
-            )
+            # 3-4. Con la transcripción del detector, render directo del rango del
+            # VOD: sin corte intermedio ni segunda transcripción
             rendered_clip_path = await process_and_create_clip(
                 config,
                 transcriber,
-                publisher,
-                cut_clip_path,  # Aquí, video_input es un solo Path
+                context.publisher,
+                video_path,  # VOD completo como input
                 streamer_name,
+                transcription_result=(
+                    highlight["transcription"] if reuse_transcription else None
+                ),
+                highlight_start_abs=highlight["start_time"],
+                highlight_end_abs=highlight["end_time"],
                 dry_run=dry_run,
                 temp_dir=config.paths.data_dir,  # Usar el directorio de datos para temporales
+                renderer=context.renderer,
+                publish_queue=context.publish_queue,
             )
 
             if rendered_clip_path:
@@ -109,20 +186,17 @@ async def process_single_file(
                     f"Highlight {i + 1} procesado, pero no se generó un clip renderizado (¿error?)."
                 )
 
-    finally:
-        logger.info("Iniciando limpieza de archivos temporales...")
-        if audio_to_clean and audio_to_clean.exists():
-            await try_delete(audio_to_clean)
-            logger.debug(f"Limpiado audio original: {audio_to_clean.name}")
-
-        for clip_path_to_clean in cut_clips_to_clean:
-            if clip_path_to_clean.exists():
-                await try_delete(clip_path_to_clean)
-                logger.debug(
-                    f"Limpiado clip cortado intermedio: {clip_path_to_clean.name}"
-                )
+    jobs = [_process_highlight(i, highlight) for i, highlight in enumerate(highlights)]
 
-        logger.info("Limpieza de archivos temporales completada.")
+    # Un fallo de ffmpeg en un highlight no aborta el resto del lote
+    results = await asyncio.gather(*jobs, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            logger.error(f"Fallo al procesar un highlight: {result}")
+
+    # Las subidas corren en segundo plano mientras se renderiza el resto
+    if context.publish_queue is not None:
+        await context.publish_queue.drain()
 
 
 # ==============================================================================
@@ -145,6 +219,8 @@ async def process_and_create_clip(
     temp_dir: Optional[
         Path
     ] = None,  # Directorio temporal para los archivos intermedios
+    renderer: Optional[VideoRenderer] = None,  # Reutilizar el del PipelineContext
+    publish_queue: Optional[PublishQueue] = None,  # Subida en segundo plano
 ) -> Optional[Path]:
     """Procesa una entrada de video (un Path de video)
     para transcribir, renderizar y opcionalmente subir un clip.
@@ -155,13 +231,14 @@ async def process_and_create_clip(
 
     logger.info(f"--- Iniciando pipeline de creación de clip para {streamer_name} ---")
 
-    renderer = VideoRenderer(config.rendering)
-    # Cutter para cortar de chunks combinados (usará temp_dir como output)
-    cutter_for_chunks = VideoCutter(temp_dir)
+    if renderer is None:
+        renderer = VideoRenderer(config.rendering)
 
     clip_source_path: (
         Path  # El path del video del que extraeremos audio y renderizaremos
     )
+    # Rango (relativo a clip_source_path) que el render lee directamente, si aplica
+    render_range: Optional[tuple[float, float]] = None
     clip_audio_path: Optional[Path] = None
     vtt_output_path: Optional[Path] = None
     rendered_clip_path: Optional[Path] = None
@@ -170,37 +247,48 @@ async def process_and_create_clip(
     files_to_clean_locally: List[Path] = []
 
     try:
-        # Si highlight_end_abs es > 0, significa que estamos en modo de tiempo real
-        # y necesitamos cortar el highlight del video combinado (video_input).
+        # Si highlight_end_abs es > 0, hay que extraer un rango del video de entrada
+        # (el video combinado en tiempo real o el VOD completo).
         if highlight_end_abs > 0:
-            logger.info(
-                f"Cortando highlight de video combinado. Rango ABSOLUTO: {highlight_start_abs:.2f}s - {highlight_end_abs:.2f}s"
-            )
             temp_cut_highlight_filename = f"{streamer_name}_highlight_{int(highlight_start_abs)}_{int(highlight_end_abs)}.mp4"
-            clip_source_path = temp_dir / temp_cut_highlight_filename
+            clip_stem = Path(temp_cut_highlight_filename).stem
 
             # Calcular tiempos relativos para el corte
             cut_start_relative = highlight_start_abs - buffer_start_absolute_time
             cut_end_relative = highlight_end_abs - buffer_start_absolute_time
 
-            # Cortar el clip
-            clip_source_path = await cutter_for_chunks.cut_clip(
-                input_path=video_input,  # El video combinado
-                start_time=cut_start_relative,
-                end_time=cut_end_relative,
-                output_filename=temp_cut_highlight_filename,
-            )
-            files_to_clean_locally.append(clip_source_path)
+            if transcription_result is not None:
+                # Con la transcripción hecha, el render lee el rango directamente
+                # (-ss/-t de entrada): una sola pasada de ffmpeg en vez de corte + render
+                logger.info(
+                    f"Renderizando highlight directamente del video de entrada. Rango ABSOLUTO: {highlight_start_abs:.2f}s - {highlight_end_abs:.2f}s"
+                )
+                clip_source_path = video_input
+                render_range = (cut_start_relative, cut_end_relative)
+            else:
+                logger.info(
+                    f"Cortando highlight de video combinado. Rango ABSOLUTO: {highlight_start_abs:.2f}s - {highlight_end_abs:.2f}s"
+                )
+                # Cutter para cortar de chunks combinados (usará temp_dir como output)
+                cutter_for_chunks = VideoCutter(temp_dir)
+                clip_source_path = await cutter_for_chunks.cut_clip(
+                    input_path=video_input,  # El video combinado
+                    start_time=cut_start_relative,
+                    end_time=cut_end_relative,
+                    output_filename=temp_cut_highlight_filename,
+                )
+                files_to_clean_locally.append(clip_source_path)
         else:
             # Modo VOD o clip pre-cortado: usar el Path directamente
             clip_source_path = video_input
+            clip_stem = clip_source_path.stem
             logger.info(f"Usando clip de entrada: {clip_source_path.name}")
 
         # 3. Generar subtítulos: VTT clásico o ASS karaoke según config
         subtitle_mode = getattr(config.rendering, "subtitle_mode", "plain")
         subtitle_path: Path
         if subtitle_mode == "karaoke":
-            ass_output_filename = clip_source_path.stem + ".ass"
+            ass_output_filename = clip_stem + ".ass"
             subtitle_path = temp_dir / ass_output_filename
             # Construir set de keywords (globales + del streamer si existen)
             keywords_set: set[str] = set(
@@ -225,7 +313,7 @@ async def process_and_create_clip(
                 keywords=keywords_set,
             )
         else:
-            vtt_output_filename = clip_source_path.stem + ".vtt"
+            vtt_output_filename = clip_stem + ".vtt"
             subtitle_path = temp_dir / vtt_output_filename
             await transcriber.save_transcription_to_vtt(
                 output_path=subtitle_path,
@@ -239,7 +327,7 @@ async def process_and_create_clip(
 
         # 4. Renderizar el clip con subtítulos y logo
         # El nombre del archivo final debe ser único, especialmente si se genera en tiempo real
-        final_clip_filename = f"{streamer_name}_{clip_source_path.stem}_rendered.mp4"
+        final_clip_filename = f"{streamer_name}_{clip_stem}_rendered.mp4"
         final_clip_path = config.paths.clips_dir / final_clip_filename
 
         logger.info(f"Renderizando clip final: {final_clip_path.name}")
@@ -247,6 +335,7 @@ async def process_and_create_clip(
             input_path=clip_source_path,
             output_path=final_clip_path,
             srt_path=subtitle_path,
+            time_range=render_range,
         )
 
         # Si estamos en dry_run, hemos renderizado, pero NO subimos.
@@ -258,31 +347,11 @@ async def process_and_create_clip(
             return rendered_clip_path  # Retorna el path del clip renderizado, saltando la subida.
 
         # 5. Opcional: Subir el clip (si la sección 'publishing' está configurada en config)
-        if publisher and rendered_clip_path:
-            logger.info(f"Subiendo clip {rendered_clip_path.name} a TikTok...")
-            try:
-                upload_success = await publisher.upload_clip(
-                    str(rendered_clip_path), streamer_name, dry_run=dry_run
-                )
-
-                if upload_success:
-                    logger.success(
-                        f"Clip {rendered_clip_path.name} subido exitosamente a TikTok."
-                    )
-                else:
-                    logger.error(
-                        f"Fallo al subir el clip {rendered_clip_path.name} a TikTok."
-                    )
-
-            except ImportError:
-                logger.error(
-                    "TikTokPublisher no pudo ser importado. Asegúrate de que el módulo existe y las dependencias están instaladas."
-                )
-            except Exception as e:
-                logger.error(
-                    f"Error inesperado al intentar subir el clip a TikTok: {e}",
-                    exc_info=True,
-                )
+        if publish_queue is not None and rendered_clip_path:
+            # La subida sigue en segundo plano; el llamador queda libre tras el render
+            publish_queue.enqueue(rendered_clip_path, streamer_name)
+        elif publisher and rendered_clip_path:
+            await _upload_rendered_clip(publisher, rendered_clip_path, streamer_name)
 
         logger.success(
             f"Pipeline de creación de clip completado para: {clip_source_path.name}. "
@@ -294,16 +363,37 @@ async def process_and_create_clip(
         logger.info(
             f"Iniciando limpieza de archivos temporales para clip: {clip_source_path.name if 'clip_source_path' in locals() else 'N/A'}..."
         )
-        for f in files_to_clean_locally:
-            if f.exists():
-                await try_delete(f)
-                logger.debug(f"Limpiado archivo temporal: {f.name}")
+        await delete_files(files_to_clean_locally)
 
         logger.info(
             f"Limpieza de archivos temporales para clip '{clip_source_path.name if 'clip_source_path' in locals() else 'N/A'}' completada."
         )
 
 
+async def _upload_rendered_clip(
+    publisher: TikTokPublisher, clip_path: Path, streamer_name: str
+) -> None:
+    """Sube un clip ya renderizado; los fallos se registran sin propagarse."""
+    logger.info(f"Subiendo clip {clip_path.name} a TikTok...")
+    try:
+        upload_success = await publisher.upload_clip(str(clip_path), streamer_name)
+
+        if upload_success:
+            logger.success(f"Clip {clip_path.name} subido exitosamente a TikTok.")
+        else:
+            logger.error(f"Fallo al subir el clip {clip_path.name} a TikTok.")
+
+    except ImportError:
+        logger.error(
+            "TikTokPublisher no pudo ser importado. Asegúrate de que el módulo existe y las dependencias están instaladas."
+        )
+    except Exception as e:
+        logger.error(
+            f"Error inesperado al intentar subir el clip a TikTok: {e}",
+            exc_info=True,
+        )
+
+
 # --- Nuevas Funciones de Ayuda para el Procesamiento en Tiempo Real ---
 
 
@@ -354,18 +444,16 @@ async def _cut_clip_from_chunks(
             "+faststart",
             combined_input_path.name,
         ]
-        process_concat = await asyncio.create_subprocess_exec(
-            *command_concat,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+        returncode, stderr_concat = await run_ffmpeg(
+            command_concat,
+            "ffmpeg concat",
             cwd=str(
                 temp_dir
             ),  # Importante: ejecutar en el directorio donde están los chunks y el list_file
         )
-        stdout_concat, stderr_concat = await process_concat.communicate()
-        if process_concat.returncode != 0:
+        if returncode != 0:
             logger.error(
-                f"FFmpeg error al concatenar chunks para corte: {stderr_concat.decode().strip()}"
+                f"FFmpeg error al concatenar chunks para corte: {stderr_concat}"
             )
             return False
         logger.debug(f"Chunks combinados temporalmente en {combined_input_path.name}")
@@ -425,48 +513,75 @@ async def _cut_clip_from_chunks(
         return False
     finally:
         # Limpiar archivos temporales de concatenación
-        if list_file_path.exists():
-            await try_delete(list_file_path)
-        if combined_input_path.exists():
-            await try_delete(combined_input_path)
+        await delete_files([list_file_path, combined_input_path])
 
 
 # --- Funciones de Ayuda ---
 
 
-async def _extract_audio(video_path: Path, output_dir: Path) -> Path:
-    """Extrae el audio de un video a un formato WAV y lo guarda en output_dir."""
-    # Asegurarse de que el proceso de FFmpeg se libere correctamente
-    # al esperar su finalización con process.communicate()
-    audio_path = output_dir / f"{video_path.stem}.wav"
-    logger.info(
-        f"Extrayendo y convirtiendo audio de '{video_path.name}' a WAV en '{output_dir.name}'..."
-    )
+async def _read_pcm_s16le(stream: asyncio.StreamReader) -> np.ndarray:
+    """
+    Lee PCM s16le de un pipe en bloques y lo convierte a float32 sobre la marcha,
+    en un array que crece al doble cuando se llena. Nunca se retiene la salida
+    completa de ffmpeg como bytes junto a su copia en float32.
+    """
+    pcm = np.empty(PCM_READ_SAMPLES * 4, dtype=np.float32)
+    size = 0
+    pending = b""
+    while data := await stream.read(PCM_READ_SAMPLES * 2):
+        data = pending + data
+        # Un bloque puede cortar una muestra a la mitad: el byte sobrante espera
+        usable = len(data) & ~1
+        pending = data[usable:]
+        block = np.frombuffer(data, dtype=np.int16, count=usable // 2)
+        if size + block.size > pcm.size:
+            pcm = np.resize(pcm, max(pcm.size * 2, size + block.size))
+        np.multiply(block, 1.0 / 32768.0, out=pcm[size : size + block.size])
+        size += block.size
+    return pcm[:size].copy()
+
+
+async def _extract_audio_pcm(video_path: Path) -> np.ndarray:
+    """
+    Decodifica el audio de un video con ffmpeg a PCM mono de 16 kHz y lo devuelve
+    como array float32 en memoria (por pipe), sin escribir un WAV en disco.
+    """
+    logger.info(f"Extrayendo audio de '{video_path.name}' a PCM en memoria...")
     args = [
         "ffmpeg",
-        "-y",
+        # stdout lleva el PCM; en stderr solo errores
+        "-v",
+        "error",
         "-i",
         str(video_path),
         "-vn",
+        "-f",
+        "s16le",
         "-acodec",
         "pcm_s16le",
         "-ar",
         "16000",
         "-ac",
         "1",
-        str(audio_path),
+        "pipe:1",
     ]
     process = await asyncio.create_subprocess_exec(
         *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
     )
-    stdout, stderr = await process.communicate()
+    pcm, stderr_tail, _ = await asyncio.gather(
+        _read_pcm_s16le(process.stdout),
+        drain_stderr(process.stderr, "ffmpeg audio"),
+        process.wait(),
+    )
     if process.returncode != 0:
-        logger.error(f"Error al extraer audio: {stderr.decode()}")
+        logger.error(f"Error al extraer audio: {stderr_tail.decode(errors='ignore')}")
         raise RuntimeError(
             f"Fallo en la extracción de audio con ffmpeg para {video_path.name}."
         )
-    logger.success(f"Extracción de audio a WAV completada: {audio_path.name}.")
-    return audio_path
+    logger.success(
+        f"Extracción de audio completada: {len(pcm) / 16000:.1f}s de PCM en memoria."
+    )
+    return pcm
 
 
 def _format_srt_time(seconds: float) -> str:
@@ -506,17 +621,18 @@ async def _get_video_duration(video_path: Path) -> float:
         raise ValueError("Invalid video duration format from ffprobe.")
 
 
-async def try_delete(path: Path, max_retries: int = 5, delay: float = 1.0):
+async def try_delete(path: Path, max_retries: int = 5, delay: float = 0.1):
     """
     Intenta eliminar un archivo de forma segura, con reintentos.
-    Función asíncrona para no bloquear el bucle de eventos.
+    Función asíncrona para no bloquear el bucle de eventos. La espera entre
+    reintentos se duplica: un handle que tarda en soltarse no retrasa al resto.
     """
     if not path.exists():
         return
 
     for attempt in range(max_retries):
         try:
-            os.remove(path)
+            await asyncio.to_thread(os.remove, path)
             logger.debug(f"Archivo temporal {path.name} eliminado con éxito.")
             return
         except PermissionError as e:
@@ -525,6 +641,7 @@ async def try_delete(path: Path, max_retries: int = 5, delay: float = 1.0):
                     f"No se pudo eliminar {path.name} (intento {attempt + 1}/{max_retries}): {e}. Reintentando en {delay}s..."
                 )
                 await asyncio.sleep(delay)
+                delay *= 2
             else:
                 logger.error(
                     f"Fallo persistente al eliminar {path.name} después de {max_retries} intentos: {e}"
@@ -534,3 +651,8 @@ async def try_delete(path: Path, max_retries: int = 5, delay: float = 1.0):
                 f"Error inesperado al intentar eliminar {path.name}: {e}", exc_info=True
             )
             return
+
+
+async def delete_files(paths: list[Path]) -> None:
+    """Elimina varios archivos en paralelo; cada uno con sus propios reintentos."""
+    await asyncio.gather(*(try_delete(path) for path in paths))
@@ -1,19 +1,85 @@
 # src/streamliner/publisher/tiktok.py
 
+import asyncio  # Necesario para asyncio.sleep en el lock
+import json
+import math  # Para math.ceil en el cálculo de chunks
+import os
+import time  # Importar para manejar timestamps
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Optional
+
+import aiofiles
 import httpx
 from loguru import logger
 from tenacity import (
     retry,
-    wait_exponential,
-    stop_after_attempt,
+    retry_if_exception,
     retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential_jitter,
 )
-import os
-import json
-import time  # Importar para manejar timestamps
-import asyncio  # Necesario para asyncio.sleep en el lock
-import math  # Para math.ceil en el cálculo de chunks
-from pathlib import Path
+
+from ..ffmpeg_io import run_ffmpeg
+
+try:  # Parser JSON en C, más rápido que json (extra 'fast')
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+# HTTP/2 solo si el extra httpx[http2] (paquete h2) está instalado
+HTTP2_AVAILABLE = find_spec("h2") is not None
+
+# Cliente de subida compartido entre publicadores: las conexiones al CDN de TikTok
+# se reutilizan entre clips en vez de pagar un handshake TLS por subida
+_upload_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_upload_client() -> httpx.AsyncClient:
+    """Devuelve el cliente de subida compartido, creándolo si hace falta."""
+    global _upload_client
+    if _upload_client is None or _upload_client.is_closed:
+        _upload_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(300.0, connect=10.0),
+            limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=1800),
+        )
+    return _upload_client
+
+
+# Respuestas transitorias que merecen reintento; el resto de 4xx es definitivo
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Backoff exponencial con jitter: subidas concurrentes que fallan a la vez no
+# reintentan sincronizadas contra el rate limit
+RETRY_WAIT = wait_exponential_jitter(multiplier=2, max=60, jitter=2)
+
+
+def _is_retryable_http_error(exc: BaseException) -> bool:
+    """Errores de red, 429 y 5xx se reintentan; otros 4xx no."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, httpx.RequestError)
+
+
+def _json_loads(raw: bytes):
+    """Deserializa un cuerpo JSON de respuesta (orjson si está disponible)."""
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def _json_dumps(payload) -> bytes:
+    """Serializa un payload JSON a bytes listos para enviar como `content=`."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode("utf-8")
+
+
+async def close_upload_client() -> None:
+    """Cierra el cliente de subida compartido (al apagar la aplicación)."""
+    global _upload_client
+    if _upload_client is not None:
+        await _upload_client.aclose()
+        _upload_client = None
 
 
 class TikTokPublisher:
@@ -27,6 +93,8 @@ class TikTokPublisher:
 
     MIN_CHUNK_SIZE = 5 * 1024 * 1024
     MAX_CHUNK_SIZE = 64 * 1024 * 1024
+    # Bloque de lectura al transmitir cada chunk: el chunk nunca se carga entero
+    STREAM_BLOCK_SIZE = 1024 * 1024
 
     def __init__(
         self, app_config, storage
@@ -46,7 +114,7 @@ class TikTokPublisher:
 
         # Timeout más generoso: 30s para conectar, 5 minutos para leer/escribir
         timeout_config = httpx.Timeout(30.0, connect=60.0, read=300.0, write=300.0)
-        self.client = httpx.AsyncClient(timeout=timeout_config)
+        self.client = httpx.AsyncClient(timeout=timeout_config, http2=HTTP2_AVAILABLE)
 
         self._access_token = self.creds.access_token  # Esto ya estará cargado
         self._refresh_token = self.creds.refresh_token  # Esto ya estará cargado
@@ -59,6 +127,11 @@ class TikTokPublisher:
         except Exception:
             data_dir = Path("data")
         self._sandbox_state_file = data_dir / ".tiktok_sandbox_state.json"
+        # Token refrescado persistido: evita un refresco (y su round-trip) por arranque
+        self._token_cache_file = data_dir / ".tiktok_token_cache.json"
+        self._load_token_cache()
+        # Plantilla de descripción resuelta una vez; por clip solo se rellena
+        self._format_description = self.config.description_template.format_map
 
         # Timestamp del último spam_risk para aplicar backoff en sandbox
         self._last_sandbox_spam_risk_ts = 0.0
@@ -71,6 +144,16 @@ class TikTokPublisher:
             s.strip() for s in scopes_env.replace(" ", "").split(",") if s.strip()
         }
 
+    def _build_title(self, streamer: str) -> str:
+        """Título del post a partir de la plantilla de descripción del config."""
+        return self._format_description(
+            {
+                "streamer_name": streamer,
+                "game_name": "Gaming",
+                "clip_title": "¡Momentazo!",
+            }
+        )
+
     def _has_scope(self, scope: str) -> bool:
         return scope in self._scopes
 
@@ -98,6 +181,52 @@ class TikTokPublisher:
         except Exception as e:
             logger.debug(f"No se pudo guardar el estado de sandbox: {e}")
 
+    def _load_token_cache(self) -> None:
+        """Reutiliza el último token refrescado si sigue vigente (> 5 minutos)."""
+        try:
+            if not self._token_cache_file.exists():
+                return
+            data = json.loads(self._token_cache_file.read_text(encoding="utf-8"))
+            if data.get("client_key") != self.creds.client_key:
+                return
+            expires_at = data.get("expires_at")
+            if (
+                isinstance(expires_at, (int, float))
+                and data.get("access_token")
+                and expires_at - time.time() > 300
+            ):
+                self._access_token = data["access_token"]
+                self._token_expires_at = float(expires_at)
+                logger.info(
+                    f"Access Token de TikTok cargado de caché. Expira en {int(expires_at - time.time())} segundos."
+                )
+            # TikTok rota el refresh_token: el guardado es más reciente que el del .env
+            if data.get("refresh_token"):
+                self._refresh_token = data["refresh_token"]
+        except Exception as e:
+            logger.debug(f"No se pudo cargar la caché del token: {e}")
+
+    def _save_token_cache(self) -> None:
+        """Guarda el token de forma atómica (archivo temporal + os.replace)."""
+        try:
+            self._token_cache_file.parent.mkdir(parents=True, exist_ok=True)
+            state = {
+                "client_key": self.creds.client_key,
+                "access_token": self._access_token,
+                "refresh_token": self._refresh_token,
+                "expires_at": self._token_expires_at,
+            }
+            tmp_file = self._token_cache_file.with_suffix(".tmp")
+            # Un temporal previo conservaría sus permisos: se crea de cero con 0o600,
+            # así el token nunca queda legible por otros usuarios
+            tmp_file.unlink(missing_ok=True)
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(json.dumps(state))
+            os.replace(tmp_file, self._token_cache_file)
+        except Exception as e:
+            logger.debug(f"No se pudo guardar la caché del token: {e}")
+
     # Y en los métodos de TikTokPublisher (_refresh_access_token y upload_clip),
     # sigues usando self.creds.client_key, self.creds.open_id, etc.
     # ¡Porque ahora self.creds es un objeto TikTokCredentials válido!
@@ -118,8 +247,8 @@ class TikTokPublisher:
 
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((httpx.RequestError, httpx.HTTPStatusError)),
+        wait=RETRY_WAIT,
+        retry=retry_if_exception(_is_retryable_http_error),
     )
     async def _refresh_access_token(self):
         """
@@ -145,7 +274,7 @@ class TikTokPublisher:
                 response = await self.client.post(REFRESH_TOKEN_URL, data=payload)
 
                 response.raise_for_status()
-                token_data = response.json()
+                token_data = _json_loads(response.content)
 
                 new_access_token = token_data.get("access_token")
                 new_refresh_token = token_data.get("refresh_token")
@@ -156,6 +285,7 @@ class TikTokPublisher:
                     self._token_expires_at = time.time() + expires_in
                     if new_refresh_token:
                         self._refresh_token = new_refresh_token
+                    self._save_token_cache()
 
                     logger.success(
                         f"Access Token de TikTok refrescado con éxito. Expira en {expires_in} segundos."
@@ -179,44 +309,51 @@ class TikTokPublisher:
             self._access_token = None
             raise
 
+    async def _iter_file_range(self, video_path: str, offset: int, length: int):
+        """Lee `length` bytes desde `offset` en bloques, para subirlos en streaming."""
+        async with aiofiles.open(video_path, "rb") as f:
+            await f.seek(offset)
+            remaining = length
+            while remaining > 0:
+                block = await f.read(min(self.STREAM_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                remaining -= len(block)
+                yield block
+
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
+        wait=RETRY_WAIT,
         retry=retry_if_exception_type(httpx.RequestError),
     )
     async def _perform_chunked_upload(
         self, upload_url: str, video_path: str, file_size: int, chunk_size: int
     ):
         """Método auxiliar para realizar la subida por fragmentos."""
-        async with httpx.AsyncClient(timeout=300) as upload_client:
-            with open(video_path, "rb") as f:
-                bytes_sent = 0
-                while bytes_sent < file_size:
-                    chunk = f.read(chunk_size)
-                    if not chunk:
-                        break
-
-                    chunk_len = len(chunk)
-                    start_byte = bytes_sent
-                    end_byte = bytes_sent + chunk_len - 1
-
-                    upload_headers = {
-                        "Content-Type": "video/mp4",
-                        "Content-Range": f"bytes {start_byte}-{end_byte}/{file_size}",
-                    }
-                    logger.debug(f"Subiendo chunk: {upload_headers['Content-Range']}")
+        upload_client = _get_upload_client()
+        for start_byte in range(0, file_size, chunk_size):
+            chunk_len = min(chunk_size, file_size - start_byte)
+            end_byte = start_byte + chunk_len - 1
+
+            upload_headers = {
+                "Content-Type": "video/mp4",
+                "Content-Length": str(chunk_len),
+                "Content-Range": f"bytes {start_byte}-{end_byte}/{file_size}",
+            }
+            logger.debug(f"Subiendo chunk: {upload_headers['Content-Range']}")
 
-                    try:
-                        response = await upload_client.put(
-                            upload_url, headers=upload_headers, content=chunk
-                        )
-                        response.raise_for_status()
-                        bytes_sent += chunk_len
-                    except httpx.HTTPStatusError as e:
-                        logger.error(
-                            f"Error al subir el chunk: {e.response.status_code} - {e.response.text}"
-                        )
-                        return False
+            try:
+                response = await upload_client.put(
+                    upload_url,
+                    headers=upload_headers,
+                    content=self._iter_file_range(video_path, start_byte, chunk_len),
+                )
+                response.raise_for_status()
+            except httpx.HTTPStatusError as e:
+                logger.error(
+                    f"Error al subir el chunk: {e.response.status_code} - {e.response.text}"
+                )
+                return False
 
         logger.success("Todos los chunks han sido subidos con éxito.")
         if bytes_sent := file_size % chunk_size:
@@ -226,9 +363,11 @@ class TikTokPublisher:
         return True
 
     @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((httpx.RequestError, httpx.HTTPStatusError)),
+        stop=stop_after_attempt(5),
+        wait=RETRY_WAIT,
+        retry=retry_if_exception(_is_retryable_http_error),
+        # Agotados los reintentos, mantener el contrato: None = inicialización fallida
+        retry_error_callback=lambda _: None,
     )
     async def _initialize_upload(self, init_url: str, payload: dict) -> dict | None:
         """Método auxiliar para inicializar una subida."""
@@ -246,10 +385,10 @@ class TikTokPublisher:
         try:
             logger.info(f"Enviando solicitud de inicialización a {init_url}...")
             response = await self.client.post(
-                init_url, headers=headers, data=json.dumps(payload)
+                init_url, headers=headers, content=_json_dumps(payload)
             )
             response.raise_for_status()
-            result = response.json()
+            result = _json_loads(response.content)
 
             if result.get("error", {}).get("code") != "ok":
                 logger.error(
@@ -263,7 +402,7 @@ class TikTokPublisher:
             # Detectar explícitamente spam_risk en SANDBOX para aplicar backoff
             body = None
             try:
-                body = e.response.json()
+                body = _json_loads(e.response.content)
             except Exception:
                 body = None
             if (
@@ -283,6 +422,8 @@ class TikTokPublisher:
             logger.error(
                 f"Error en la solicitud de inicialización: {e.response.status_code} - {e.response.text}"
             )
+            if _is_retryable_http_error(e):
+                raise  # 429/5xx: tenacity reintenta con backoff
             return None
 
     async def upload_clip(
@@ -352,11 +493,7 @@ class TikTokPublisher:
                         "Subida directa por bytes falló o está deshabilitada. Intentando publicación directa (requiere scope 'video.publish')."
                     )
                     post_details = {
-                        "title": self.config.description_template.format(
-                            streamer_name=streamer,
-                            game_name="Gaming",
-                            clip_title="¡Momentazo!",
-                        ),
+                        "title": self._build_title(streamer),
                         "privacy_level": "SELF_ONLY",
                     }
                     publish_id = await self.upload_video(
@@ -414,11 +551,7 @@ class TikTokPublisher:
                     )
                     return False
                 post_details = {
-                    "title": self.config.description_template.format(
-                        streamer_name=streamer,
-                        game_name="Gaming",
-                        clip_title="¡Momentazo!",
-                    ),
+                    "title": self._build_title(streamer),
                     "privacy_level": "SELF_ONLY",
                 }
                 publish_id = await self.upload_video(
@@ -463,11 +596,7 @@ class TikTokPublisher:
                     "Subida directa por bytes también falló o está deshabilitada. Intentando publicación directa (requiere scope 'video.publish')."
                 )
                 post_details = {
-                    "title": self.config.description_template.format(
-                        streamer_name=streamer,
-                        game_name="Gaming",
-                        clip_title="¡Momentazo!",
-                    ),
+                    "title": self._build_title(streamer),
                     "privacy_level": "SELF_ONLY",
                 }
                 publish_id = await self.upload_video(
@@ -507,11 +636,7 @@ class TikTokPublisher:
                         "MULTIPART (inbox) falló o está en backoff en SANDBOX. Intentando publicación directa (requiere scope 'video.publish')."
                     )
                     post_details = {
-                        "title": self.config.description_template.format(
-                            streamer_name=streamer,
-                            game_name="Gaming",
-                            clip_title="¡Momentazo!",
-                        ),
+                        "title": self._build_title(streamer),
                         "privacy_level": "SELF_ONLY",
                     }
                     publish_id = await self.upload_video(
@@ -532,11 +657,7 @@ class TikTokPublisher:
                 )
                 return False
             post_details = {
-                "title": self.config.description_template.format(
-                    streamer_name=streamer,
-                    game_name="Gaming",
-                    clip_title="¡Momentazo!",
-                ),
+                "title": self._build_title(streamer),
                 "privacy_level": "SELF_ONLY",
             }
             publish_id = await self.upload_video(
@@ -611,7 +732,7 @@ class TikTokPublisher:
                         continue
                     response.raise_for_status()
 
-                response_data = response.json()
+                response_data = _json_loads(response.content)
                 if response_data.get("error", {}).get("code") != "ok":
                     logger.error(
                         f"Error en la respuesta de subida de video a sandbox: {response_data['error']}"
@@ -746,14 +867,9 @@ class TikTokPublisher:
                 "128k",
                 str(output_path),
             ]
-            process = await asyncio.create_subprocess_exec(
-                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
-            if process.returncode != 0:
-                logger.error(
-                    f"Fallo al transcodificar para sandbox: {stderr.decode(errors='ignore')}"
-                )
+            returncode, stderr_tail = await run_ffmpeg(cmd, "ffmpeg sandbox")
+            if returncode != 0:
+                logger.error(f"Fallo al transcodificar para sandbox: {stderr_tail}")
                 return None
             # Validar tamaño
             size_mb = os.path.getsize(output_path) / (1024 * 1024)
@@ -898,13 +1014,13 @@ class TikTokPublisher:
         for url in candidate_paths:
             try:
                 resp = await self.client.post(
-                    url, headers=headers, data=json.dumps(payload)
+                    url, headers=headers, content=_json_dumps(payload)
                 )
                 if resp.status_code == 404:
                     # Endpoint no existente; probar siguiente
                     continue
                 resp.raise_for_status()
-                body = resp.json()
+                body = _json_loads(resp.content)
                 if body.get("error", {}).get("code") == "ok":
                     return True
             except httpx.HTTPStatusError as e:
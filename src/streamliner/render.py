@@ -1,33 +1,86 @@
 # src/streamliner/render.py
 
 import asyncio
+import json
+import os
 import platform
 import subprocess
+from functools import lru_cache
 from pathlib import Path
 from loguru import logger
 from typing import Optional
 
+from .ffmpeg_io import drain_stderr
+
+# El fondo desenfocado se calcula a 1/4 de resolución (1/16 de píxeles) y se
+# reescala: visualmente equivale a boxblur=20:10 a resolución completa
+BG_BLUR_DOWNSCALE = 4
+BG_BLUR = "boxblur=5:10"
+
+# Entradas sondeadas que se recuerdan (un VOD se sondea una vez para todos sus clips)
+PROBE_CACHE_SIZE = 64
+
+# Prioridad reducida (nice) del render en POSIX: el bucle de eventos y Whisper
+# no compiten en igualdad con libx264
+RENDER_NICENESS = 5
+
+# Margen de aspecto para tratar una entrada como 9:16 exacta (sin fondo desenfocado)
+VERTICAL_ASPECT_TOLERANCE = 0.01
+
+# Cada cuánto se revisa si un render sigue avanzando
+RENDER_WATCHDOG_TICK_SECONDS = 5
+
+# Se evalúa una vez al importar, no en cada render
+_IS_WINDOWS = platform.system() == "Windows"
+# Una sola pasada: barras de Windows a "/" y ":" escapado para el filtro
+_WIN_SUBTITLE_PATH_TABLE = str.maketrans({"\\": "/", ":": "\\:"})
+
+
+@lru_cache(maxsize=64)
+def _escape_subtitle_path(srt_posix_path: str) -> str:
+    """Escapa una ruta POSIX para usarla entre comillas en el filtro ass/subtitles."""
+    if _IS_WINDOWS:
+        # En Windows el único ":" posible en una ruta es el de la unidad
+        srt_posix_path = srt_posix_path.translate(_WIN_SUBTITLE_PATH_TABLE)
+    return srt_posix_path.replace("'", "'\\''")
+
 
 class VideoRenderer:
     def __init__(self, config):
         self.config = config
+        # (ruta, mtime, tamaño) -> (ancho, alto, códec de audio)
+        self._probe_cache: dict[tuple, tuple[int, int, Optional[str]]] = {}
+        # El logo no cambia entre renders: se resuelve una sola vez
+        logo_path = getattr(config, "logo_path", None)
+        self._logo_posix: Optional[str] = (
+            Path(logo_path).resolve().as_posix()
+            if logo_path and Path(logo_path).exists()
+            else None
+        )
         logger.info(
             f"VideoRenderer inicializado con fg_zoom_factor: {self.config.fg_zoom_factor}, "
             f"fg_offset_x: '{self.config.fg_offset_x}', fg_offset_y: '{self.config.fg_offset_y}'"
         )
 
-    async def _get_video_dimensions(self, video_path: Path) -> tuple[int, int]:
-        """Obtiene el ancho y alto de un video usando ffprobe."""
+    async def _probe_input(self, video_path: Path) -> tuple[int, int, Optional[str]]:
+        """
+        Obtiene ancho, alto y códec de audio de un video con una sola llamada a
+        ffprobe. El resultado se cachea mientras el archivo no cambie.
+        """
+        stat_result = video_path.stat()
+        cache_key = (str(video_path), stat_result.st_mtime_ns, stat_result.st_size)
+        cached = self._probe_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         cmd = [
             "ffprobe",
             "-v",
             "error",
-            "-select_streams",
-            "v:0",
             "-show_entries",
-            "stream=width,height",
+            "stream=codec_type,codec_name,width,height",
             "-of",
-            "csv=p=0:s=x",
+            "json",
             str(video_path),
         ]
         process = await asyncio.create_subprocess_exec(
@@ -41,15 +94,24 @@ class VideoRenderer:
                 f"Fallo al obtener dimensiones del video: {stderr.decode()}"
             )
 
-        output = stdout.decode().strip()
-        if "x" in output:
-            width_str, height_str = output.split("x")
-            return int(width_str), int(height_str)
-        else:
+        streams = json.loads(stdout or b"{}").get("streams", [])
+        video = next((st for st in streams if st.get("codec_type") == "video"), None)
+        audio = next((st for st in streams if st.get("codec_type") == "audio"), None)
+        if not video or "width" not in video or "height" not in video:
             raise ValueError(
-                f"No se pudieron parsear las dimensiones de ffprobe: {output}"
+                f"No se pudieron parsear las dimensiones de ffprobe: {stdout.decode()}"
             )
 
+        result = (
+            int(video["width"]),
+            int(video["height"]),
+            audio.get("codec_name") if audio else None,
+        )
+        if len(self._probe_cache) >= PROBE_CACHE_SIZE:
+            self._probe_cache.clear()
+        self._probe_cache[cache_key] = result
+        return result
+
     async def _probe_duration_seconds(self, video_path: Path) -> float:
         """Retorna la duración del video en segundos usando ffprobe o 0.0 en error."""
         try:
@@ -78,42 +140,97 @@ class VideoRenderer:
         except Exception:
             return 0.0
 
+    async def _run_ffmpeg_watched(self, args: list[str]) -> tuple[int, str]:
+        """
+        Ejecuta ffmpeg leyendo su `-progress` por stdout. Si deja de avanzar durante
+        `render_stall_seconds` o supera `render_timeout_seconds`, se mata el proceso.
+        Devuelve el código de salida y la cola del stderr (memoria acotada).
+        """
+        stall_seconds = getattr(self.config, "render_stall_seconds", 60)
+        timeout_seconds = getattr(self.config, "render_timeout_seconds", 900)
+        loop = asyncio.get_running_loop()
+        started = last_progress = loop.time()
+
+        # En Windows la prioridad se fija al crear el proceso; en POSIX, justo después
+        priority_kwargs = (
+            {"creationflags": subprocess.BELOW_NORMAL_PRIORITY_CLASS}
+            if _IS_WINDOWS
+            else {}
+        )
+        process = await asyncio.create_subprocess_exec(
+            *args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **priority_kwargs
+        )
+        if not _IS_WINDOWS:
+            try:
+                os.setpriority(os.PRIO_PROCESS, process.pid, RENDER_NICENESS)
+            except OSError as e:
+                logger.debug(f"No se pudo bajar la prioridad del render: {e}")
+
+        async def _watch_progress() -> None:
+            nonlocal last_progress
+            async for line in process.stdout:
+                # Cada informe de -progress termina con progress=continue|end
+                if line.startswith(b"progress="):
+                    last_progress = loop.time()
+
+        stderr_task = asyncio.create_task(drain_stderr(process.stderr, "ffmpeg render"))
+        progress_task = asyncio.create_task(_watch_progress())
+        wait_task = asyncio.create_task(process.wait())
+        failure = None
+        try:
+            while not wait_task.done():
+                await asyncio.wait({wait_task}, timeout=RENDER_WATCHDOG_TICK_SECONDS)
+                now = loop.time()
+                if wait_task.done():
+                    break
+                if now - last_progress > stall_seconds:
+                    failure = f"sin progreso durante {stall_seconds}s"
+                elif now - started > timeout_seconds:
+                    failure = f"superó el límite de {timeout_seconds}s"
+                else:
+                    continue
+                logger.error(f"El render de ffmpeg {failure}. Terminando el proceso.")
+                process.kill()
+                await wait_task
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            stderr_tail = await stderr_task
+            await progress_task
+
+        err_text = stderr_tail.decode(errors="ignore").strip()
+        if failure:
+            raise RuntimeError(f"Render de ffmpeg abortado ({failure}): {err_text}")
+        return process.returncode, err_text
+
     async def render_vertical_clip(
         self,
         input_path: Path,
         output_path: Path,
         srt_path: Optional[Path] = None,
+        time_range: Optional[tuple[float, float]] = None,
     ) -> Path:
         """
         Crea un clip vertical 9:16 con fondo desenfocado y subtítulos quemados,
         o adapta un video ya vertical.
+        Con `time_range` (inicio, fin) solo se renderiza ese tramo de la entrada,
+        sin necesidad de cortarlo antes en otro proceso de ffmpeg.
         """
         logger.info(f"Renderizando clip vertical: {output_path}")
 
         srt_filter_part = ""
-        srt_final_path_for_ffmpeg_command: str = ""
 
         if srt_path and srt_path.exists():
-            srt_posix_path = srt_path.resolve().as_posix()
-
-            if (
-                platform.system() == "Windows"
-                and len(srt_posix_path) > 1
-                and srt_posix_path[1] == ":"
-            ):
-                srt_final_path_for_ffmpeg_command = srt_posix_path.replace(
-                    ":", "\\:", 1
-                )
-            else:
-                srt_final_path_for_ffmpeg_command = srt_posix_path
-
-            escaped_for_ffmpeg_quotes = srt_final_path_for_ffmpeg_command.replace(
-                "'", "'\\''"
+            escaped_for_ffmpeg_quotes = _escape_subtitle_path(
+                srt_path.resolve().as_posix()
             )
 
             # Si el archivo es .ass, ya contiene estilos; no aplicar force_style
             if srt_path.suffix.lower() == ".ass":
-                srt_filter_part = f"ass='{escaped_for_ffmpeg_quotes}'"
+                # Shaping 'simple' evita HarfBuzz en cada evento: suficiente para texto latino
+                shaping = getattr(self.config, "subtitle_shaping", "simple")
+                srt_filter_part = f"ass='{escaped_for_ffmpeg_quotes}':shaping={shaping}"
             else:
                 # Es VTT/SRT, podemos forzar un estilo por defecto si no viene nada en config
                 force_style = self.config.subtitle_style.strip()
@@ -135,8 +252,16 @@ class VideoRenderer:
 
         output_width = 1080
         output_height = 1920
+        bg_width = output_width // BG_BLUR_DOWNSCALE
+        bg_height = output_height // BG_BLUR_DOWNSCALE
+        # Fondo: llenar, recortar, desenfocar en baja resolución y volver a escalar
+        bg_filter = (
+            f"scale={bg_width}:{bg_height}:force_original_aspect_ratio=increase,"
+            f"crop={bg_width}:{bg_height},{BG_BLUR},"
+            f"scale={output_width}:{output_height}"
+        )
 
-        input_width, input_height = await self._get_video_dimensions(input_path)
+        input_width, input_height, audio_codec = await self._probe_input(input_path)
         logger.info(f"Dimensiones del video de entrada: {input_width}x{input_height}")
 
         # --- NUEVA LÓGICA DE RENDERIZADO ADAPTATIVO ---
@@ -153,6 +278,13 @@ class VideoRenderer:
         # Si es casi vertical, cambiamos la estrategia.
         is_already_vertical_ish = is_almost_vertical and not is_horizontal
 
+        # Entrada ya en 9:16: el fondo quedaría tapado por completo, así que se
+        # omiten split, blur y overlay
+        is_exact_vertical = (
+            abs(input_width / input_height - output_width / output_height)
+            <= VERTICAL_ASPECT_TOLERANCE
+        )
+
         filter_parts = []
         current_video_stream = ""
         logo_input_args = []
@@ -161,16 +293,23 @@ class VideoRenderer:
         # fg_zoom_factor = self.config.fg_zoom_factor
         # target_fg_height = int(output_height * fg_zoom_factor)
 
-        if is_already_vertical_ish:
+        if is_exact_vertical:
+            logger.info(
+                "El video de entrada ya es 9:16. Se escalará a 1080x1920 sin fondo desenfocado."
+            )
+            filter_parts.append(
+                f"[0:v]scale={output_width}:{output_height}:force_original_aspect_ratio=increase,"
+                f"crop={output_width}:{output_height}[video_base];"
+            )
+
+        elif is_already_vertical_ish:
             logger.info(
                 "El video de entrada es 'casi vertical'. Se escalará para llenar la altura y se rellenará con blur a los lados."
             )
             # 1. Dividir el stream
             filter_parts.append("[0:v]split=2[v_bg_src][v_fg_src];")
             # 2. Fondo: escalar para llenar 1080x1920, recortar y desenfocar
-            filter_parts.append(
-                f"[v_bg_src]scale={output_width}:{output_height}:force_original_aspect_ratio=increase,crop={output_width}:{output_height},boxblur=20:10[bg_filtered];"
-            )
+            filter_parts.append(f"[v_bg_src]{bg_filter}[bg_filtered];")
             # 3. Primer plano: escalar para que la altura sea 1920, manteniendo el aspect ratio
             filter_parts.append(f"[v_fg_src]scale=-1:{output_height}[fg_scaled];")
             # 4. Superponer el primer plano centrado sobre el fondo
@@ -184,12 +323,6 @@ class VideoRenderer:
             )
             # Lógica original para videos horizontales
 
-            # FILTRO PARA EL FONDO (BG):
-            bg_filter = (
-                f"scale={output_width}:{output_height}:force_original_aspect_ratio=increase,"
-                f"crop={output_width}:{output_height},boxblur=20:10"
-            )
-
             target_fg_height = int(output_height * self.config.fg_zoom_factor)
             # FILTRO PARA EL PRIMER PLANO (FG):
             fg_filter = (
@@ -222,12 +355,8 @@ class VideoRenderer:
             current_video_stream = "[video_after_subs]"
 
         # 6. Añadir el logo si self.config.logo_path existe.
-        if self.config.logo_path and Path(self.config.logo_path).exists():
-            logo_path_obj = Path(self.config.logo_path)
-            logo_input_args = [
-                "-i",
-                logo_path_obj.resolve().as_posix(),
-            ]
+        if self._logo_posix:
+            logo_input_args = ["-i", self._logo_posix]
 
             filter_parts.append("[1:v]scale=150:-1[logo_scaled];")
             filter_parts.append(
@@ -235,59 +364,92 @@ class VideoRenderer:
             )
             current_video_stream = "[v_final]"
 
-        final_filter_complex = "".join(filter_parts)
-        if final_filter_complex.endswith(";"):
-            final_filter_complex = final_filter_complex[:-1]
+        # Una cadena por línea: el parser de filtergraph ignora los saltos de línea
+        final_filter_complex = "\n".join(filter_parts).rstrip(";")
+        # El grafo va en un script: sin reglas de citado de la línea de comandos
+        # ni límites de longitud del argv (Windows)
+        filter_script_path = output_path.with_name(f"{output_path.stem}_graph.txt")
+        await asyncio.to_thread(
+            filter_script_path.write_text, final_filter_complex, encoding="utf-8"
+        )
+
+        # Seek de entrada: solo se decodifica el tramo y los tiempos arrancan en 0,
+        # alineados con los subtítulos (relativos al inicio del clip)
+        range_args = []
+        if time_range is not None:
+            start_time, end_time = time_range
+            range_args = ["-ss", str(start_time), "-t", str(end_time - start_time)]
+
+        # El audio AAC se copia tal cual: re-codificarlo es una pasada de CPU extra
+        if audio_codec == "aac":
+            audio_args = ["-c:a", "copy"]
+        else:
+            audio_args = ["-c:a", "aac", "-b:a", "192k"]
+        video_encoder = getattr(self.config, "video_encoder", "libx264")
+        if video_encoder == "h264_nvenc":
+            # Codificación en GPU NVIDIA; los filtros siguen en CPU
+            video_args = [
+                "-c:v",
+                "h264_nvenc",
+                "-preset",
+                "p4",
+                "-rc",
+                "vbr",
+                "-cq",
+                "22",
+            ]
+        else:
+            preset = getattr(self.config, "x264_preset", "superfast")
+            video_args = ["-c:v", "libx264", "-preset", preset, "-crf", "22"]
+
+        # Tope de hilos: libx264 rinde poco más allá de ~la mitad de los núcleos
+        # y el resto queda para el bucle de eventos y Whisper
+        ffmpeg_threads = getattr(self.config, "ffmpeg_threads", 0) or max(
+            2, (os.cpu_count() or 4) // 2
+        )
 
         args = [
             "ffmpeg",
             "-y",
+            *range_args,
             "-i",
             str(input_path),
             *logo_input_args,
-            "-filter_complex",
-            final_filter_complex,
+            "-filter_complex_script",
+            str(filter_script_path),
             "-map",
             current_video_stream,
             "-map",
             "0:a:0",
-            "-c:v",
-            "libx264",
-            "-preset",
-            "fast",
-            "-crf",
-            "22",
-            "-c:a",
-            "aac",
-            "-b:a",
-            "192k",
+            *video_args,
+            "-threads",
+            str(ffmpeg_threads),
+            *audio_args,
+            # moov al principio: el MP4 se puede reproducir/procesar sin leerlo entero
+            "-movflags",
+            "+faststart",
+            # Progreso legible por máquina en stdout: alimenta el watchdog
+            "-nostats",
+            "-progress",
+            "pipe:1",
             str(output_path),
         ]
 
         logger.debug(f"Ejecutando ffmpeg para renderizar: {' '.join(args)}")
+        logger.debug(f"Filtergraph del render:\n{final_filter_complex}")
 
-        process = await asyncio.create_subprocess_exec(
-            *args, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-        )
-
-        stdout, stderr = await process.communicate()
-
-        # --- CORRECCIÓN PARA LIBERAR RECURSOS ---
-        # Asegurarse de que todos los pipes se cierren explícitamente.
-        # Esto es crucial en Windows para evitar que el proceso mantenga un bloqueo
-        # sobre el archivo de salida, lo que causa errores de "Acceso Denegado".
-        if process.stdin:
-            await process.stdin.wait_closed()
-        # -----------------------------------------
+        try:
+            returncode, err_text = await self._run_ffmpeg_watched(args)
+        finally:
+            await asyncio.to_thread(filter_script_path.unlink, missing_ok=True)
 
-        if process.returncode != 0:
-            err_text = stderr.decode()
+        if returncode != 0:
             # Tolerancia: si el archivo de salida existe y tiene duración > 1s, consideramos éxito parcial.
             if output_path.exists():
                 duration = await self._probe_duration_seconds(output_path)
                 if duration >= 1.0:
                     logger.warning(
-                        f"ffmpeg devolvió código {process.returncode}, pero el archivo resultante parece válido (duración ~{duration:.2f}s). Continuando."
+                        f"ffmpeg devolvió código {returncode}, pero el archivo resultante parece válido (duración ~{duration:.2f}s). Continuando."
                     )
                     return output_path
             logger.error(f"Error al renderizar el video: {err_text}")
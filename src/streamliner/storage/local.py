@@ -1,10 +1,13 @@
 # src/streamliner/storage/local.py
 
+import asyncio
 import shutil
 from pathlib import Path
+
 from loguru import logger
-from .base import BaseStorage
+
 from ..config import AppConfig
+from .base import BaseStorage
 
 
 class LocalStorage(BaseStorage):
@@ -25,7 +28,9 @@ class LocalStorage(BaseStorage):
         """
         final_path = self.base_path / remote_filename
         if local_path != final_path:
-            shutil.move(str(local_path), str(final_path))
+            # shutil.move hace rename en el mismo disco y copia + borra si no;
+            # corre en un hilo para no bloquear el bucle de eventos
+            await asyncio.to_thread(shutil.move, str(local_path), str(final_path))
         logger.info(f"Archivo confirmado en almacenamiento local: {final_path}")
         return str(final_path)
 
@@ -37,7 +42,8 @@ class LocalStorage(BaseStorage):
                 f"El archivo no existe en el almacenamiento local: {source_path}"
             )
             return False
-        shutil.copy(str(source_path), str(local_path))
+        # La copia bloqueante corre en un hilo, fuera del bucle de eventos
+        await asyncio.to_thread(shutil.copy, source_path, local_path)
         return True
 
     async def get_public_url(self, remote_filename: str) -> str | None:
@@ -1,13 +1,21 @@
 # src/streamliner/stt.py (CORREGIDO)
 
 import asyncio
-from typing import Optional
+from typing import Optional, Union
 from pathlib import Path
 from loguru import logger
 from faster_whisper import WhisperModel
 import torch
+import numpy as np
 from dataclasses import dataclass, field
 import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+
+try:  # Inferencia por lotes (faster-whisper >= 1.1)
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:  # pragma: no cover - depende del entorno
+    BatchedInferencePipeline = None
 
 # No necesitamos importar TranscriptionConfig aquí si vamos a pasar los atributos individuales
 # Si la necesitas para tipado en algún otro método, puedes mantenerla o definir un dataclass local si es solo para STT
@@ -28,6 +36,15 @@ import re
 # --- FIN DE CÓDIGO DEPURACIÓN TEMPORAL ---
 
 
+@lru_cache(maxsize=8192)
+def _format_vtt_millis(total_ms: int) -> str:
+    """HH:MM:SS.mmm a partir de milisegundos enteros (cacheado: los bordes se repiten)."""
+    seconds, milliseconds = divmod(total_ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02}:{minutes:02}:{seconds:02}.{milliseconds:03}"
+
+
 @dataclass
 class TranscriptionResult:
     text: str
@@ -43,6 +60,7 @@ class Transcriber:
         device: str,
         compute_type: str,
         data_dir: Path,  # Renombrado para evitar confusión con config.data_dir
+        batch_size: int = 0,  # >0: BatchedInferencePipeline en GPU
     ):
         self.whisper_model_name = whisper_model  # Guardamos el nombre del modelo
         self.initial_device = device  # Guardamos el dispositivo solicitado
@@ -57,6 +75,10 @@ class Transcriber:
             self.compute_type = (
                 self.initial_compute_type
             )  # Usar el solicitado si es CUDA
+            if self.compute_type == "int8":
+                # En GPU, int8_float16 conserva los pesos int8 pero acumula en fp16
+                # (tensor cores): mismo uso de memoria y bastante más rápido
+                self.compute_type = "int8_float16"
         else:
             self.device = "cpu"
             self.compute_type = (
@@ -67,18 +89,39 @@ class Transcriber:
         self.model_data_dir.mkdir(parents=True, exist_ok=True)
 
         self.model = None  # Se carga bajo demanda
+        # El lote solo compensa en GPU; en CPU se transcribe de forma secuencial
+        self.batch_size = batch_size if self.device == "cuda" else 0
+        self._batched_model = None
+        # Evita que dos workers carguen el modelo a la vez (doble RAM/VRAM)
+        self._load_lock = asyncio.Lock()
+        # Hilo propio para Whisper: CTranslate2 ya serializa las llamadas al modelo,
+        # así no ocupa los hilos del pool por defecto (E/S de archivos, borrados...)
+        self._whisper_pool = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="whisper"
+        )
         logger.info(
             f"Transcriber inicializado. Modelo: {self.whisper_model_name}, Dispositivo: {self.device}, Tipo de cómputo: {self.compute_type}, Directorio de modelos: {self.model_data_dir}"
         )
 
+    async def _run_in_whisper_thread(self, func, *args, **kwargs):
+        """Ejecuta una llamada bloqueante de Whisper en su hilo dedicado."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._whisper_pool, partial(func, *args, **kwargs)
+        )
+
     async def _load_model(self):
         """Carga el modelo Faster-Whisper si aún no está cargado."""
-        if self.model is None:
+        if self.model is not None:
+            return
+        async with self._load_lock:
+            if self.model is not None:
+                return
             logger.info(
                 f"Cargando modelo Faster-Whisper '{self.whisper_model_name}' en {self.device} con tipo de cómputo {self.compute_type}..."
             )
-            # faster_whisper.WhisperModel.from_pretrained es síncrono, lo ejecutamos en un threadpool
-            self.model = await asyncio.to_thread(
+            # faster_whisper.WhisperModel.from_pretrained es síncrono, lo ejecutamos en el hilo de Whisper
+            self.model = await self._run_in_whisper_thread(
                 WhisperModel,
                 self.whisper_model_name,  # Usar el nombre del modelo
                 device=self.device,
@@ -87,22 +130,49 @@ class Transcriber:
                     self.model_data_dir
                 ),  # Especificar dónde faster_whisper debe buscar/descargar el modelo
             )
+            if self.batch_size > 0 and BatchedInferencePipeline is not None:
+                self._batched_model = BatchedInferencePipeline(model=self.model)
             logger.success("Modelo Faster-Whisper cargado exitosamente.")
 
+    def _run_transcription(self, audio_input, word_timestamps: bool):
+        """
+        Ejecuta Whisper de forma síncrona. Faster-Whisper decodifica de forma perezosa
+        al iterar los segmentos, así que se materializan aquí (en el hilo de trabajo)
+        para no bloquear el bucle de eventos.
+        """
+        if self._batched_model is not None:
+            # Los tramos de voz (VAD) se decodifican juntos en un solo forward por lote
+            segments_generator, info = self._batched_model.transcribe(
+                audio_input,
+                language="es",
+                word_timestamps=word_timestamps,
+                batch_size=self.batch_size,
+            )
+        else:
+            segments_generator, info = self.model.transcribe(
+                audio_input, language="es", word_timestamps=word_timestamps
+            )
+        return list(segments_generator), info
+
     # ... (El resto de tus métodos transcribe, save_transcription_to_vtt, _format_timestamp son correctos) ...
-    async def transcribe(self, audio_path: Path) -> TranscriptionResult:
+    async def transcribe(
+        self, audio_path: Union[Path, np.ndarray]
+    ) -> TranscriptionResult:
         """
         Transcribe un archivo de audio usando Faster-Whisper y retorna un diccionario
         con la transcripción y los segmentos de texto con sus timestamps.
+        También acepta directamente un array float32 mono a 16 kHz.
         """
         await self._load_model()
+        if isinstance(audio_path, np.ndarray):
+            audio_input = audio_path
+            audio_path = f"<array de {len(audio_input) / 16000:.1f}s>"
+        else:
+            audio_input = str(audio_path)
         logger.info(f"Transcribiendo audio: {audio_path}")
         try:
-            segments_generator, info = await asyncio.to_thread(
-                self.model.transcribe,
-                str(audio_path),
-                language="es",
-                word_timestamps=False,
+            segments_generator, info = await self._run_in_whisper_thread(
+                self._run_transcription, audio_input, word_timestamps=False
             )
 
             segments = []
@@ -153,44 +223,15 @@ class Transcriber:
             f"Guardando transcripción en VTT: {output_path} con offset {clip_start_offset:.2f}s"
         )
         try:
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write("WEBVTT\n\n")
-
-                idx = 1
-                for segment in transcription_result.segments:
-                    start = segment["start"] + clip_start_offset
-                    end = segment["end"] + clip_start_offset
-                    text = segment["text"].strip()
-
-                    if not text:
-                        continue
-
-                    # Wrap del texto por palabras
-                    lines = self._wrap_text(text, max_chars_per_line)
-                    # Si supera el máximo de líneas, dividimos en sub-cues repartiendo el tiempo
-                    sub_cues = self._split_lines_into_cues(lines, max_lines_per_cue)
-
-                    # Repartir el tiempo del segmento en partes iguales por sub-cue
-                    n = max(1, len(sub_cues))
-                    seg_duration = max(0.8, end - start)
-                    base = seg_duration / n
-                    cur_start = start
-                    for i, cue_lines in enumerate(sub_cues):
-                        # Último cue ajusta exactamente al final para evitar acumulación de error
-                        if i == n - 1:
-                            cur_end = end
-                        else:
-                            cur_end = min(end, cur_start + base)
-                        # Evitar cues de duración nula
-                        if cur_end - cur_start <= 0.01:
-                            continue
-                        f.write(f"{idx}\n")
-                        f.write(
-                            f"{self._format_timestamp(cur_start)} --> {self._format_timestamp(cur_end)}\n"
-                        )
-                        f.write("\n".join(cue_lines) + "\n\n")
-                        idx += 1
-                        cur_start = cur_end
+            # Construcción y escritura fuera del bucle de eventos
+            await asyncio.to_thread(
+                self._write_vtt,
+                output_path,
+                transcription_result,
+                clip_start_offset,
+                max_lines_per_cue,
+                max_chars_per_line,
+            )
             logger.success(f"Transcripción VTT guardada exitosamente en: {output_path}")
         except Exception as e:
             logger.error(
@@ -199,15 +240,60 @@ class Transcriber:
             )
             raise
 
+    def _write_vtt(
+        self,
+        output_path: Path,
+        transcription_result: TranscriptionResult,
+        clip_start_offset: float,
+        max_lines_per_cue: int,
+        max_chars_per_line: int,
+    ) -> None:
+        """Núcleo síncrono de `save_transcription_to_vtt` (se ejecuta en un hilo)."""
+        # El archivo se construye en memoria y se escribe de una sola vez
+        parts = ["WEBVTT\n\n"]
+
+        idx = 1
+        for segment in transcription_result.segments:
+            start = segment["start"] + clip_start_offset
+            end = segment["end"] + clip_start_offset
+            text = segment["text"].strip()
+
+            if not text:
+                continue
+
+            # Wrap del texto por palabras
+            lines = self._wrap_text(text, max_chars_per_line)
+            # Si supera el máximo de líneas, dividimos en sub-cues repartiendo el tiempo
+            sub_cues = self._split_lines_into_cues(lines, max_lines_per_cue)
+
+            # Repartir el tiempo del segmento en partes iguales por sub-cue
+            n = max(1, len(sub_cues))
+            seg_duration = max(0.8, end - start)
+            base = seg_duration / n
+            cur_start = start
+            for i, cue_lines in enumerate(sub_cues):
+                # Último cue ajusta exactamente al final para evitar acumulación de error
+                if i == n - 1:
+                    cur_end = end
+                else:
+                    cur_end = min(end, cur_start + base)
+                # Evitar cues de duración nula
+                if cur_end - cur_start <= 0.01:
+                    continue
+                parts.append(
+                    f"{idx}\n"
+                    f"{self._format_timestamp(cur_start)} --> {self._format_timestamp(cur_end)}\n"
+                    + "\n".join(cue_lines)
+                    + "\n\n"
+                )
+                idx += 1
+                cur_start = cur_end
+
+        output_path.write_text("".join(parts), encoding="utf-8")
+
     def _format_timestamp(self, seconds: float) -> str:
         """Formatea segundos a un string de timestamp VTT (HH:MM:SS.mmm)."""
-        milliseconds = int((seconds - int(seconds)) * 1000)
-        seconds = int(seconds)
-        minutes = seconds // 60
-        hours = minutes // 60
-        seconds = seconds % 60
-        minutes = minutes % 60
-        return f"{hours:02}:{minutes:02}:{seconds:02}.{milliseconds:03}"
+        return _format_vtt_millis(round(seconds * 1000))
 
     def _wrap_text(self, text: str, max_chars_per_line: int) -> list[str]:
         words = text.split()
@@ -260,11 +346,8 @@ class Transcriber:
         if transcription_result is None and audio_path:
             await self._load_model()
             logger.info(f"Transcribiendo audio con timestamps de palabra: {audio_path}")
-            segments_generator, info = await asyncio.to_thread(
-                self.model.transcribe,
-                str(audio_path),
-                language="es",
-                word_timestamps=True,
+            segments_generator, info = await self._run_in_whisper_thread(
+                self._run_transcription, str(audio_path), word_timestamps=True
             )
             segments = []
             full_text = []
@@ -355,8 +438,7 @@ class Transcriber:
 
         content = "".join(lines)
         try:
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(content)
+            await asyncio.to_thread(output_path.write_text, content, encoding="utf-8")
             logger.success(f"Transcripción ASS (karaoke) guardada en: {output_path}")
         except Exception as e:
             logger.error(f"Error al guardar ASS en {output_path}: {e}", exc_info=True)
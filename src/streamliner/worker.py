@@ -7,15 +7,14 @@ import os
 from collections import deque
 import shutil
 import aiofiles
-import subprocess
 import stat
+from typing import Optional
+import numpy as np
 
 from .config import AppConfig
-from .pipeline import process_and_create_clip, _extract_audio
-from .stt import Transcriber
-from .detector import HighlightDetector
-from .publisher.tiktok import TikTokPublisher
-from .storage import get_storage
+from .pipeline import PipelineContext, process_and_create_clip, _extract_audio_pcm
+from .detector import AUDIO_DECODE_ERRORS, HighlightDetector
+from .ffmpeg_io import run_ffmpeg
 
 
 class ProcessingWorker:
@@ -30,27 +29,22 @@ class ProcessingWorker:
         streamer: str,
         stream_session_dir: Path,
         dry_run: bool = False,
+        context: Optional[PipelineContext] = None,
     ):
         self.config = config
         self.streamer = streamer
         self.stream_session_dir = stream_session_dir
         self.dry_run = dry_run
 
-        # --- REFACTORIZACIÓN: Inicializar componentes una sola vez ---
-        self.transcriber = Transcriber(
-            whisper_model=config.transcription.whisper_model,
-            device=config.transcription.device,
-            compute_type=config.transcription.compute_type,
-            data_dir=config.paths.transcriber_models_dir,
-        )
-        self.detector = HighlightDetector(
-            config.detection,
-            self.transcriber,  # Pasar la instancia del transcriber
-        )
-        self.storage_manager = get_storage(config)
-        self.publisher = (
-            TikTokPublisher(config, self.storage_manager) if config.publishing else None
-        )
+        # --- REFACTORIZACIÓN: Componentes compartidos (Whisper, publisher) ---
+        # El monitor pasa un PipelineContext único para no recargar el modelo
+        # en cada sesión; sin él, el worker crea el suyo.
+        self.context = context or PipelineContext.from_config(config)
+        self.transcriber = self.context.transcriber
+        # Un solo detector (y modelo Whisper) para todos los workers
+        self.detector = self.context.detector
+        self.storage_manager = self.context.storage
+        self.publisher = self.context.publisher
         # -----------------------------------------------------------
 
         self.highlight_buffer = deque(
@@ -61,9 +55,30 @@ class ProcessingWorker:
         self.clip_processing_lock = asyncio.Lock()
 
         self.current_stream_time_offset = 0
+        # Segundos absolutos del stream ya cubiertos por un clip (evita duplicados)
+        self._clipped_seconds: set[int] = set()
         # Tarea activa para evitar solapamiento de análisis
         self._analysis_task = None  # type: asyncio.Task | None
 
+        # Entrada acotada de chunks: una sola tarea los consume en orden. Nunca
+        # hace falta guardar más pendientes de los que caben en el buffer.
+        self._chunk_queue: asyncio.Queue[Path] = asyncio.Queue(
+            maxsize=max(1, config.real_time_processing.highlight_buffer_size)
+        )
+        self._intake_task = None  # type: asyncio.Task | None
+        # Etapa de render: el análisis entrega el highlight y sigue con la
+        # siguiente ventana mientras ffmpeg renderiza. maxsize=2 frena el análisis
+        # si los renders se acumulan.
+        self._render_queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=2)
+        self._render_task = None  # type: asyncio.Task | None
+        # PCM (16 kHz) de cada chunk del buffer: cada chunk se decodifica una sola
+        # vez aunque participe en varios análisis de la ventana deslizante
+        self._chunk_pcm: dict[Path, np.ndarray] = {}
+        # Chunks de la ventana en análisis: si el buffer los expulsa mientras
+        # tanto, su borrado se aplaza hasta que el corte del clip termine
+        self._pinned_chunks: set[Path] = set()
+        self._deferred_deletes: set[Path] = set()
+
         logger.info(
             f"[Worker-{self.streamer}] Inicializado. Directorio de sesión: {self.stream_session_dir}"
         )
@@ -77,10 +92,102 @@ class ProcessingWorker:
         async with self.clip_processing_lock:
             pass  # El bloque se ejecutará solo cuando el lock esté libre.
 
+    async def submit_chunk(self, chunk_path: Path) -> None:
+        """
+        Entrega un chunk recién grabado sin bloquear la grabación.
+        Si la cola está llena, se descarta el chunk pendiente más antiguo:
+        el buffer deslizante lo habría expulsado de todas formas.
+        """
+        if self._intake_task is None or self._intake_task.done():
+            self._intake_task = asyncio.create_task(self._consume_chunks())
+        if self._chunk_queue.full():
+            stale_chunk = self._chunk_queue.get_nowait()
+            self._chunk_queue.task_done()
+            logger.warning(
+                f"[Worker-{self.streamer}] Cola de chunks llena. Descartando {stale_chunk.name}."
+            )
+            await self._safe_delete(stale_chunk)
+        self._chunk_queue.put_nowait(chunk_path)
+
+    async def _consume_chunks(self) -> None:
+        while True:
+            chunk_path = await self._chunk_queue.get()
+            try:
+                await self.add_chunk_for_processing(chunk_path)
+            # El consumidor debe sobrevivir a cualquier fallo de un chunk: se
+            # registra con traza completa y se sigue con el siguiente
+            except Exception as e:  # noqa: BLE001
+                logger.error(
+                    f"[Worker-{self.streamer}] Error al añadir {chunk_path.name} al buffer: {e}",
+                    exc_info=True,
+                )
+            finally:
+                self._chunk_queue.task_done()
+
+    async def _drain_chunk_queue(self) -> None:
+        """Espera a que los chunks pendientes entren al buffer y detiene el consumidor."""
+        await self._stop_consumer(self._chunk_queue, self._intake_task)
+        self._intake_task = None
+
+    async def _enqueue_render(self, job: dict) -> None:
+        """Entrega un highlight a la etapa de render (espera si la cola está llena)."""
+        if self._render_task is None or self._render_task.done():
+            self._render_task = asyncio.create_task(self._render_clips())
+        await self._render_queue.put(job)
+
+    async def _render_clips(self) -> None:
+        while True:
+            job = await self._render_queue.get()
+            try:
+                # Adquirir el lock antes de iniciar el proceso de creación del clip
+                async with self.clip_processing_lock:
+                    await process_and_create_clip(
+                        self.config,
+                        self.transcriber,  # Pasar instancia
+                        self.publisher,  # Pasar instancia
+                        job["video_path"],  # Copia propia del video combinado
+                        self.streamer,
+                        transcription_result=job["transcription"],
+                        buffer_start_absolute_time=job["buffer_start_abs"],
+                        highlight_start_abs=job["highlight_start_abs"],
+                        highlight_end_abs=job["highlight_end_abs"],
+                        dry_run=self.dry_run,  # <--- Usar el dry_run del worker
+                        temp_dir=self.stream_session_dir,
+                        renderer=self.context.renderer,
+                        publish_queue=self.context.publish_queue,
+                    )
+            # Un clip fallido no debe detener la etapa: se registra con traza
+            # completa y se sigue con el siguiente
+            except Exception as e:  # noqa: BLE001
+                logger.error(
+                    f"[Worker-{self.streamer}] Fallo al crear el clip de {job['video_path'].name}: {e}",
+                    exc_info=True,
+                )
+            finally:
+                await self._safe_delete(job["video_path"])
+                self._render_queue.task_done()
+
+    async def _drain_render_queue(self) -> None:
+        """Espera a que terminen los renders pendientes y detiene la etapa."""
+        await self._stop_consumer(self._render_queue, self._render_task)
+        self._render_task = None
+
+    @staticmethod
+    async def _stop_consumer(queue: asyncio.Queue, task: Optional[asyncio.Task]):
+        if task is None:
+            return
+        if not task.done():
+            await queue.join()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
     async def add_chunk_for_processing(self, chunk_path: Path):
         """
         Añade un nuevo chunk al buffer y dispara la lógica de detección de highlights.
-        Llamado desde StreamMonitor.
+        Llamado por el consumidor de la cola de chunks.
         """
         if not chunk_path.exists():
             logger.warning(f"Chunk {chunk_path.name} no existe, omitiendo.")
@@ -107,7 +214,10 @@ class ProcessingWorker:
         self.highlight_buffer.append(chunk_path)
 
         # Si hubo un expulsado automático, eliminar su archivo en disco de forma segura
-        if orphan_chunk is not None and orphan_chunk.exists():
+        if orphan_chunk is not None and orphan_chunk in self._pinned_chunks:
+            # El análisis en curso aún puede necesitarlo para armar el clip
+            self._deferred_deletes.add(orphan_chunk)
+        elif orphan_chunk is not None and orphan_chunk.exists():
             logger.info(
                 f"Buffer lleno. Chunk expulsado automáticamente: {orphan_chunk.name}. Eliminando del disco."
             )
@@ -130,7 +240,7 @@ class ProcessingWorker:
     async def _process_highlights_from_buffer(self):
         """
         Une los chunks en el buffer, extrae audio, transcribe y detecta highlights.
-        Si se detecta un highlight, lo corta y lo publica.
+        Si se detecta un highlight, lo entrega a la etapa de render para cortarlo y publicarlo.
         """
         # Acceder a min_chunks_for_detection a través de self.config.real_time_processing
         if (
@@ -142,54 +252,69 @@ class ProcessingWorker:
             )
             return
 
-        # Nombre de archivo temporal para la combinación de chunks en el buffer.
-        combined_video_path_for_detection = (
-            self.stream_session_dir / f"{self.streamer}_combined_for_detection.mp4"
-        )
-
-        success = await self._combine_chunks_for_detection(
-            combined_video_path_for_detection
-        )
-        if not success:
-            logger.error(
-                f"[Worker-{self.streamer}] Fallo al combinar chunks para detección."
-            )
-            return
-
-        logger.info(
-            f"[Worker-{self.streamer}] Chunks combinados para detección: {combined_video_path_for_detection.name}"
-        )
+        # Ventana analizada: el buffer puede avanzar durante la detección.
+        # Sus chunks quedan protegidos del borrado hasta cortar el clip.
+        buffer_chunks = list(self.highlight_buffer)
+        buffer_end_offset = self.current_stream_time_offset
+        self._pinned_chunks.update(buffer_chunks)
 
-        audio_path = None
         try:
-            audio_path = await _extract_audio(
-                combined_video_path_for_detection, self.stream_session_dir
-            )
+            # El audio de la ventana se arma con el PCM cacheado de cada chunk:
+            # cada chunk se decodifica una vez, no en cada análisis que lo incluye
+            detection_input = await self._buffer_pcm(buffer_chunks)
 
             combined_duration_approx = (
                 self.config.real_time_processing.chunk_duration_seconds
-                * len(self.highlight_buffer)
+                * len(buffer_chunks)
             )
 
-            highlights = await self.detector.find_highlights(
-                audio_path,  # El detector ya tiene el transcriber
-                combined_duration_approx,
-                streamer_name=self.streamer,
-                temp_dir=self.stream_session_dir,
-            )
+            # Whisper es un recurso único: los workers detectan por turnos
+            async with self.context.detection_lock:
+                highlights = await self.detector.find_highlights(
+                    detection_input,  # El detector ya tiene el transcriber
+                    combined_duration_approx,
+                    streamer_name=self.streamer,
+                    temp_dir=self.stream_session_dir,
+                )
 
             if highlights:
                 logger.success(
                     f"¡HIGHLIGHTS ({len(highlights)}) ENCONTRADOS en el buffer del streamer {self.streamer}!"
                 )
-                best_highlight = highlights[0]
-
-                # Calcular el tiempo absoluto de inicio del buffer actual.
-                # Es el offset total hasta el final del último chunk añadido, menos la duración total del buffer.
+                # Calcular el tiempo absoluto de inicio del buffer analizado.
+                # Es el offset hasta el final de su último chunk, menos la duración total del buffer.
                 buffer_start_absolute_time = (
-                    self.current_stream_time_offset - combined_duration_approx
+                    buffer_end_offset - combined_duration_approx
                 )
 
+                # Los segundos anteriores a la ventana ya no pueden reaparecer:
+                # descartarlos mantiene el conjunto acotado en directos largos
+                self._clipped_seconds = {
+                    second
+                    for second in self._clipped_seconds
+                    if second >= buffer_start_absolute_time
+                }
+
+                # El buffer es una ventana deslizante: el mismo momento reaparece en
+                # análisis sucesivos. Elegir el mejor highlight aún no convertido en clip.
+                best_highlight = next(
+                    (
+                        h
+                        for h in highlights
+                        if round(
+                            buffer_start_absolute_time
+                            + (h["start_time"] + h["end_time"]) / 2
+                        )
+                        not in self._clipped_seconds
+                    ),
+                    None,
+                )
+                if best_highlight is None:
+                    logger.info(
+                        f"[Worker-{self.streamer}] Los highlights del buffer ya tienen clip. Omitiendo."
+                    )
+                    return
+
                 # Estos son los tiempos ABSOLUTOS en el stream completo
                 highlight_start_abs = (
                     buffer_start_absolute_time + best_highlight["start_time"]
@@ -204,23 +329,41 @@ class ProcessingWorker:
                     f"Tiempos RELATIVOS al buffer: {best_highlight['start_time']:.2f}s - {best_highlight['end_time']:.2f}s"
                 )
 
-                # Adquirir el lock antes de iniciar el proceso de creación del clip
-                async with self.clip_processing_lock:
-                    await process_and_create_clip(
-                        self.config,
-                        self.transcriber,  # Pasar instancia
-                        self.publisher,  # Pasar instancia
-                        combined_video_path_for_detection,  # <-- PASAR VIDEO COMBINADO
-                        self.streamer,
-                        transcription_result=best_highlight[
-                            "transcription"
-                        ],  # <-- PASAR TRANSCRIPCIÓN
-                        buffer_start_absolute_time=buffer_start_absolute_time,  # Pasar el inicio absoluto del buffer
-                        highlight_start_abs=highlight_start_abs,  # Pasar el inicio absoluto del highlight en el stream
-                        highlight_end_abs=highlight_end_abs,  # Pasar el fin absoluto del highlight en el stream
-                        dry_run=self.dry_run,  # <--- Usar el dry_run del worker
-                        temp_dir=self.stream_session_dir,
+                # Solo se combina el video cuando hay un clip que cortar; el render
+                # se queda con este archivo y lo borra al terminar
+                clip_source_path = (
+                    self.stream_session_dir
+                    / f"{self.streamer}_highlight_{int(highlight_start_abs):06d}.mp4"
+                )
+                success = await self._combine_chunks_for_detection(
+                    clip_source_path, buffer_chunks
+                )
+                if not success:
+                    logger.error(
+                        f"[Worker-{self.streamer}] Fallo al combinar chunks del highlight."
                     )
+                    if clip_source_path.exists():
+                        await self._safe_delete(clip_source_path)
+                    return
+
+                logger.info(
+                    f"[Worker-{self.streamer}] Chunks combinados para el clip: {clip_source_path.name}"
+                )
+
+                # Marcar los segundos del clip antes de procesarlo para no duplicarlo
+                self._clipped_seconds.update(
+                    range(int(highlight_start_abs), int(highlight_end_abs) + 1)
+                )
+
+                await self._enqueue_render(
+                    {
+                        "video_path": clip_source_path,
+                        "transcription": best_highlight["transcription"],
+                        "buffer_start_abs": buffer_start_absolute_time,
+                        "highlight_start_abs": highlight_start_abs,
+                        "highlight_end_abs": highlight_end_abs,
+                    }
+                )
             else:
                 logger.info(
                     f"No se encontraron highlights significativos en el buffer del streamer {self.streamer}"
@@ -234,19 +377,64 @@ class ProcessingWorker:
                     exc_info=True,
                 )
         finally:
-            if audio_path and audio_path.exists():
-                await self._safe_delete(audio_path)
-            if combined_video_path_for_detection.exists():
-                await self._safe_delete(combined_video_path_for_detection)
+            self._pinned_chunks.difference_update(buffer_chunks)
+            await self._delete_released_chunks()
             # Señalar que el análisis terminó
             self._analysis_task = None
 
-    async def _combine_chunks_for_detection(self, output_path: Path) -> bool:
+    async def _delete_released_chunks(self):
+        """Borra los chunks expulsados del buffer que ya no usa ningún análisis."""
+        for chunk_path in list(self._deferred_deletes):
+            if chunk_path in self._pinned_chunks:
+                continue
+            self._deferred_deletes.discard(chunk_path)
+            if chunk_path in self.highlight_buffer or not chunk_path.exists():
+                continue
+            logger.info(
+                f"Chunk expulsado del buffer tras el análisis: {chunk_path.name}. Eliminando del disco."
+            )
+            await self._safe_delete(chunk_path)
+
+    async def _buffer_pcm(self, chunks: list[Path]) -> np.ndarray:
+        """
+        Devuelve el audio de los chunks como un único array PCM float32 a 16 kHz.
+        Solo se decodifican los chunks nuevos; los expulsados salen de la caché.
+        """
+        for stale in self._chunk_pcm.keys() - set(chunks):
+            del self._chunk_pcm[stale]
+
+        for chunk_path in chunks:
+            if chunk_path in self._chunk_pcm:
+                continue
+            try:
+                if HighlightDetector.supports_direct_decode(chunk_path):
+                    pcm = await asyncio.to_thread(
+                        HighlightDetector.decode_audio, chunk_path
+                    )
+                else:
+                    pcm = await _extract_audio_pcm(chunk_path)
+            except AUDIO_DECODE_ERRORS as e:
+                # Silencio en su lugar: mantiene alineados los tiempos del buffer
+                logger.error(
+                    f"[Worker-{self.streamer}] No se pudo decodificar {chunk_path.name}: {e}"
+                )
+                pcm = np.zeros(
+                    int(self.config.real_time_processing.chunk_duration_seconds)
+                    * 16000,
+                    dtype=np.float32,
+                )
+            self._chunk_pcm[chunk_path] = pcm
+
+        return np.concatenate([self._chunk_pcm[p] for p in chunks])
+
+    async def _combine_chunks_for_detection(
+        self, output_path: Path, chunks: list[Path]
+    ) -> bool:
         """
-        Une los chunks de video en el highlight_buffer en un solo archivo MP4 temporal
-        para el procesamiento de detección.
+        Une los chunks de video de la ventana analizada en un solo archivo MP4
+        del que se corta el clip.
         """
-        if not self.highlight_buffer:
+        if not chunks:
             return False
 
         list_file_path = self.stream_session_dir / f"{self.streamer}_concat_list.txt"
@@ -261,7 +449,7 @@ class ProcessingWorker:
         # ---------------------
 
         async with aiofiles.open(list_file_path, "w") as f:
-            for chunk_path in self.highlight_buffer:
+            for chunk_path in chunks:
                 # Aquí usamos la ruta absoluta del chunk, escapada para FFmpeg.
                 # Path.as_posix() convierte a barras "/", que FFmpeg suele preferir incluso en Windows.
                 # También se añade 'file ' al principio para el formato de la lista.
@@ -313,21 +501,12 @@ class ProcessingWorker:
         # --------------------------
 
         try:
-            process = await asyncio.create_subprocess_exec(
-                *command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+            returncode, stderr_tail = await run_ffmpeg(
+                command, f"ffmpeg concat {self.streamer}"
             )
-            stdout, stderr = await process.communicate()
 
-            if process.returncode != 0:
-                logger.error(
-                    f"FFmpeg error al concatenar chunks: {stderr.decode().strip()}"
-                )
-                # --- AÑADE ESTE LOG PARA VER EL STDERR COMPLETO DE FFmpeg ---
-                logger.debug(f"FFmpeg STDOUT:\n{stdout.decode().strip()}")
-                logger.debug(f"FFmpeg STDERR:\n{stderr.decode().strip()}")
-                # -----------------------------------------------------------
+            if returncode != 0:
+                logger.error(f"FFmpeg error al concatenar chunks: {stderr_tail}")
                 return False
             logger.debug(f"Chunks concatenados exitosamente a {output_path.name}")
             return True
@@ -345,6 +524,9 @@ class ProcessingWorker:
         Procesa los chunks que quedan en el buffer antes de que el worker se apague.
         No elimina los archivos, solo asegura que se procesen.
         """
+        # Los chunks aún en cola deben entrar al buffer antes del último análisis
+        await self._drain_chunk_queue()
+
         logger.info(
             f"[Worker-{self.streamer}] Procesando {len(self.highlight_buffer)} chunks restantes antes de terminar."
         )
@@ -352,9 +534,12 @@ class ProcessingWorker:
         if self.highlight_buffer:
             # Ejecutar una última vez el procesamiento para los chunks que quedaron
             await self._process_highlights_from_buffer()
+        # Los clips ya detectados se terminan antes de limpiar la sesión
+        await self._drain_render_queue()
 
         # Vaciar el buffer en memoria
         self.highlight_buffer.clear()
+        self._chunk_pcm.clear()
 
         logger.success(
             f"[Worker-{self.streamer}] Procesamiento final de chunks completado."
@@ -370,6 +555,7 @@ class ProcessingWorker:
         )
 
         self.highlight_buffer.clear()
+        self._chunk_pcm.clear()
 
         if not self.stream_session_dir or not self.stream_session_dir.exists():
             logger.warning(
@@ -383,44 +569,12 @@ class ProcessingWorker:
         max_retries = 5
         retry_delay = 1.0  # segundos
 
-        def _onerror(func, path, exc_info):
-            try:
-                # Quitar bit de solo lectura y reintentar
-                os.chmod(path, stat.S_IWRITE)
-                func(path)
-            except Exception:
-                pass
-
         for attempt in range(max_retries):
             try:
-                # Borrado granular: elimina archivos primero para ayudar a Windows a liberar locks
-                for root, dirs, files in os.walk(
-                    self.stream_session_dir, topdown=False
-                ):
-                    for name in files:
-                        file_path = Path(root) / name
-                        try:
-                            os.remove(file_path)
-                        except PermissionError:
-                            # Intentar quitar solo-lectura y reintentar
-                            try:
-                                os.chmod(file_path, stat.S_IWRITE)
-                                os.remove(file_path)
-                            except Exception as e:
-                                logger.debug(
-                                    f"No se pudo eliminar archivo en primer paso: {file_path} ({e})"
-                                )
-                        except Exception:
-                            # Ignorar: rmtree con onerror lo manejará
-                            pass
-                    for name in dirs:
-                        dir_path = Path(root) / name
-                        try:
-                            os.rmdir(dir_path)
-                        except Exception:
-                            pass
-
-                shutil.rmtree(self.stream_session_dir, onerror=_onerror)
+                # Recorrido y borrado bloqueantes: fuera del bucle de eventos
+                await asyncio.to_thread(
+                    self._remove_session_tree, self.stream_session_dir
+                )
                 logger.success(
                     f"[Worker-{self.streamer}] Directorio de sesión {self.stream_session_dir} limpiado exitosamente."
                 )
@@ -449,18 +603,66 @@ class ProcessingWorker:
                         f"[Worker-{self.streamer}] Fallo persistente al limpiar el directorio de sesión {self.stream_session_dir}."
                     )
 
+    @staticmethod
+    def _remove_session_tree(session_dir: Path) -> None:
+        """Borra el directorio de sesión (síncrono; se ejecuta en un hilo)."""
+
+        def _onerror(func, path, exc_info):
+            try:
+                # Quitar bit de solo lectura y reintentar
+                os.chmod(path, stat.S_IWRITE)
+                func(path)
+            except OSError as e:
+                logger.debug(f"No se pudo eliminar {path} ({e})")
+
+        # Borrado granular: elimina archivos primero para ayudar a Windows a liberar locks
+        ProcessingWorker._remove_files_first(os.fspath(session_dir))
+
+        shutil.rmtree(session_dir, onerror=_onerror)
+
+    @staticmethod
+    def _remove_files_first(dir_path: str) -> None:
+        """
+        Borra los archivos del árbol (de las hojas hacia arriba) y los directorios
+        que queden vacíos. Usa os.scandir con rutas str: sin objetos Path por entrada.
+        """
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    ProcessingWorker._remove_files_first(entry.path)
+                    try:
+                        os.rmdir(entry.path)
+                    except OSError as e:
+                        # Aún con contenido o bloqueado: rmtree lo reintentará
+                        logger.debug(f"No se pudo eliminar {entry.path} ({e})")
+                    continue
+                try:
+                    os.remove(entry.path)
+                except PermissionError:
+                    # Intentar quitar solo-lectura y reintentar
+                    try:
+                        os.chmod(entry.path, stat.S_IWRITE)
+                        os.remove(entry.path)
+                    except OSError as e:
+                        logger.debug(
+                            f"No se pudo eliminar archivo en primer paso: {entry.path} ({e})"
+                        )
+                except OSError as e:
+                    # Ignorar: rmtree con onerror lo manejará
+                    logger.debug(f"No se pudo eliminar {entry.path} ({e})")
+
     async def _safe_delete(
         self,
         path: Path,
         max_retries: int = 3,
-        retry_delay: float = 0.5,
+        retry_delay: float = 0.1,
     ):
         if not path.exists():
             return
 
         for attempt in range(max_retries):
             try:
-                os.remove(path)
+                await asyncio.to_thread(os.remove, path)
                 logger.debug(f"Archivo {path.name} limpiado exitosamente.")
                 return
             except OSError as e:
@@ -469,6 +671,7 @@ class ProcessingWorker:
                         f"No se pudo eliminar {path.name} (intento {attempt + 1}/{max_retries}): {e}. Reintentando en {retry_delay}s."
                     )
                     await asyncio.sleep(retry_delay)
+                    retry_delay *= 2
                 else:
                     logger.error(
                         f"Fallo final al limpiar el archivo {path.name} después de {max_retries} intentos: {e}"
@@ -0,0 +1,48 @@
+# tests/conftest.py
+
+from dataclasses import dataclass, field
+from unittest.mock import AsyncMock
+
+import pytest
+
+from streamliner.detector import HighlightDetector
+
+# --- Clases de Configuración Falsas (Mocks) compartidas por los tests ---
+# Estas clases deben reflejar la estructura de tus clases de configuración reales
+# para que los tests puedan crear mocks que el código bajo prueba espera.
+
+
+@dataclass
+class MockScoringConfig:
+    rms_weight: float = 0.6
+    keyword_weight: float = 0.4
+    keywords: dict = field(default_factory=lambda: {"clutch": 3.0})
+
+
+@dataclass
+class MockDetectionConfig:
+    clip_duration_seconds: int = 10
+    hype_score_threshold: float = 1.5
+    rms_peak_threshold: float = 0.7
+    scoring: MockScoringConfig = field(
+        default_factory=MockScoringConfig
+    )  # Contiene 'keywords'
+    keywords: dict[str, float] = field(
+        default_factory=lambda: {"clutch": 3.0, "epico": 2.0}
+    )
+    streamer_keywords: dict[str, dict[str, float]] = field(
+        default_factory=lambda: {"test": {"fail": -1.0}}
+    )
+    max_clips_per_vod: int = 3
+
+
+@pytest.fixture
+def detection_config() -> MockDetectionConfig:
+    """Configuración de detección nueva por test (algunos tests la modifican)."""
+    return MockDetectionConfig()
+
+
+@pytest.fixture
+def detector(detection_config: MockDetectionConfig) -> HighlightDetector:
+    """Detector con un Transcriber simulado, accesible como `detector.transcriber`."""
+    return HighlightDetector(detection_config, AsyncMock())
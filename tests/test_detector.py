@@ -10,32 +10,7 @@ import shutil  # Necesario para la limpieza de directorios
 from streamliner.detector import HighlightDetector
 
 # --- Clases de Configuración Falsas (Mocks) para la Prueba ---
-# Estas clases deben reflejar la estructura de tus clases de configuración reales
-# para que los tests puedan crear mocks que el código bajo prueba espera.
-
-
-@dataclass
-class MockScoringConfig:
-    rms_weight: float = 0.6
-    keyword_weight: float = 0.4
-    keywords: dict = field(default_factory=lambda: {"clutch": 3.0})
-
-
-@dataclass
-class MockDetectionConfig:
-    clip_duration_seconds: int = 10
-    hype_score_threshold: float = 1.5
-    rms_peak_threshold: float = 0.7
-    scoring: MockScoringConfig = field(
-        default_factory=MockScoringConfig
-    )  # Contiene 'keywords'
-    keywords: dict[str, float] = field(
-        default_factory=lambda: {"clutch": 3.0, "epico": 2.0}
-    )
-    streamer_keywords: dict[str, dict[str, float]] = field(
-        default_factory=lambda: {"test": {"fail": -1.0}}
-    )
-    max_clips_per_vod: int = 3
+# MockDetectionConfig y los fixtures `detection_config`/`detector` viven en conftest.py
 
 
 @dataclass
@@ -53,7 +28,7 @@ class MockTranscriptionConfig:
 # MockAppConfig se usa solo para organizar la creación de esas sub-configs para el test.
 @dataclass
 class MockAppConfig:
-    detection: MockDetectionConfig
+    detection: object
     transcription: MockTranscriptionConfig
 
     # paths_config no es pasado al constructor de HighlightDetector directamente
@@ -83,12 +58,12 @@ class TranscriptionResult:
 
 
 @pytest.mark.asyncio
-async def test_find_highlights_scoring_logic(tmp_path: Path):
+async def test_find_highlights_scoring_logic(tmp_path: Path, detection_config):
     """
     Verifica que la lógica de scoring del detector funciona correctamente.
     """
     # 1. Preparación (Arrange)
-    mock_detection_config = MockDetectionConfig()
+    mock_detection_config = detection_config
     mock_transcription_config = MockTranscriptionConfig()
     mock_app_config = MockAppConfig(
         detection=mock_detection_config, transcription=mock_transcription_config
@@ -176,3 +151,258 @@ async def test_find_highlights_scoring_logic(tmp_path: Path):
     # Limpiar los directorios mock creados
     # Borra el directorio raíz /mock_test_data para limpiar todo lo creado allí
     shutil.rmtree(mock_app_config.paths.base_dir, ignore_errors=True)
+
+
+@pytest.mark.asyncio
+async def test_calculate_rms_matches_per_window_reference(tmp_path: Path, detector):
+    """
+    Verifica que el cálculo vectorizado de RMS coincide con el cálculo por ventana.
+    """
+    import soundfile as sf
+
+    sample_rate = 16000
+    rng = np.random.default_rng(0)
+    # 3.5 segundos estéreo: la última media ventana debe descartarse
+    audio = rng.uniform(-0.5, 0.5, size=(int(sample_rate * 3.5), 2))
+    audio_path = tmp_path / "audio.wav"
+    sf.write(audio_path, audio, sample_rate, subtype="FLOAT")
+
+    rms = await detector._calculate_rms(str(audio_path))
+
+    mono = audio.mean(axis=1)
+    expected = [
+        np.sqrt(np.mean(mono[i * sample_rate : (i + 1) * sample_rate] ** 2))
+        for i in range(3)
+    ]
+    assert rms.shape == (3,)
+    assert rms.dtype == np.float32
+    np.testing.assert_allclose(rms, expected, rtol=1e-5)
+
+
+@pytest.mark.asyncio
+async def test_calculate_rms_reads_pcm16_wav_through_mmap(tmp_path: Path, detector):
+    """
+    Un WAV PCM de 16 bits se lee proyectado en memoria y da el mismo RMS que
+    decodificándolo con soundfile.
+    """
+    import soundfile as sf
+
+    from streamliner.detector import _map_wav_pcm
+
+    sample_rate = 16000
+    rng = np.random.default_rng(2)
+    audio = (rng.uniform(-0.5, 0.5, sample_rate * 3) * 32767).astype(np.int16)
+    audio_path = tmp_path / "audio.wav"
+    sf.write(audio_path, audio, sample_rate, subtype="PCM_16")
+
+    pcm, mapped_rate = _map_wav_pcm(audio_path)
+    assert (pcm.shape, pcm.dtype, mapped_rate) == ((len(audio), 1), np.int16, 16000)
+
+    rms = await detector._calculate_rms(str(audio_path))
+
+    decoded, _ = sf.read(audio_path, dtype="float32")
+    expected = np.sqrt(np.mean(decoded.reshape(3, sample_rate) ** 2, axis=1))
+    np.testing.assert_allclose(rms, expected, rtol=1e-5)
+
+
+@pytest.mark.asyncio
+async def test_extract_audio_segment_slices_wav_in_process(tmp_path: Path, detector):
+    """
+    Verifica que el segmento se recorta del WAV principal sin lanzar ffmpeg.
+    """
+    import soundfile as sf
+
+    sample_rate = 16000
+    audio = np.arange(sample_rate * 10, dtype=np.int16)
+    audio_path = tmp_path / "audio.wav"
+    sf.write(audio_path, audio, sample_rate, subtype="PCM_16")
+
+    with patch("asyncio.create_subprocess_exec") as mock_exec:
+        segment_path = await detector._extract_audio_segment(
+            audio_path, 2.0, 4.5, tmp_path
+        )
+        # Mismo segundo redondeado: no debe pisar el segmento anterior
+        other_path = await detector._extract_audio_segment(
+            audio_path, 2.2, 4.4, tmp_path
+        )
+
+    mock_exec.assert_not_called()
+    assert other_path != segment_path
+    segment, segment_rate = sf.read(segment_path, dtype="int16")
+    assert segment_rate == sample_rate
+    np.testing.assert_array_equal(segment, audio[2 * sample_rate : 72000])
+
+
+@pytest.mark.asyncio
+async def test_non_wav_input_is_decoded_directly_with_pyav(tmp_path: Path, detector):
+    """
+    Un contenedor que no es WAV se decodifica con PyAV (sin WAV intermedio) y da
+    el mismo RMS y los mismos rangos que el audio original.
+    """
+    import soundfile as sf
+
+    import streamliner.detector as detector_module
+
+    if detector_module.av is None:
+        pytest.skip("PyAV no está instalado")
+
+    sample_rate = 16000
+    rng = np.random.default_rng(0)
+    audio = (rng.uniform(-0.5, 0.5, sample_rate * 4) * 32767).astype(np.int16)
+    audio_path = tmp_path / "audio.flac"
+    sf.write(audio_path, audio, sample_rate, subtype="PCM_16")
+    reference = audio.astype(np.float32) / 32768
+
+    assert detector.supports_direct_decode(audio_path)
+    rms = await detector._calculate_rms(str(audio_path))
+    segment, segment_rate = detector._read_audio_range(audio_path, 1.0, 2.5)
+
+    expected_rms = np.sqrt(np.mean(reference.reshape(4, sample_rate) ** 2, axis=1))
+    np.testing.assert_allclose(rms, expected_rms, rtol=1e-5)
+    assert segment_rate == sample_rate
+    np.testing.assert_allclose(segment, reference[sample_rate:40000], atol=1e-6)
+
+
+@pytest.mark.asyncio
+async def test_find_highlights_batches_candidates_in_one_transcription(
+    tmp_path: Path, detector
+):
+    """
+    Con varios candidatos a 16 kHz, Whisper se invoca una sola vez y los segmentos
+    se reparten a cada candidato con tiempos relativos a su inicio.
+    """
+    import soundfile as sf
+
+    from streamliner.stt import TranscriptionResult as RealTranscriptionResult
+
+    audio_path = tmp_path / "audio.wav"
+    sf.write(audio_path, np.zeros(16000 * 60, dtype=np.int16), 16000)
+
+    mock_transcriber = detector.transcriber
+    mock_transcriber.transcribe.return_value = RealTranscriptionResult(
+        text="hola clutch",
+        segments=[
+            {"text": "hola", "start": 1.0, "end": 3.0},
+            {"text": "clutch", "start": 12.0, "end": 14.0},
+        ],
+        language="es",
+    )
+
+    mock_rms_scores = np.zeros(60)
+    mock_rms_scores[15] = 1.0
+    mock_rms_scores[45] = 1.0
+    with patch.object(
+        detector,
+        "_calculate_rms",
+        new_callable=AsyncMock,
+        return_value=mock_rms_scores,
+    ):
+        highlights = await detector.find_highlights(
+            audio_path, 60, streamer_name="test_streamer", temp_dir=tmp_path
+        )
+
+    mock_transcriber.transcribe.assert_called_once()
+    batch_audio = mock_transcriber.transcribe.call_args.args[0]
+    assert isinstance(batch_audio, np.ndarray)
+
+    assert len(highlights) == 1
+    highlight = highlights[0]
+    assert (highlight["start_time"], highlight["end_time"]) == (40.0, 50.0)
+    assert highlight["text"] == "clutch"
+    segment = highlight["transcription"].segments[0]
+    assert segment["start"] == pytest.approx(12.0 - 10.06)
+
+
+@pytest.mark.parametrize("distance", [1, 3, 10])
+def test_find_rms_peaks_matches_scipy(distance: int):
+    """
+    La búsqueda de picos con NumPy devuelve lo mismo que scipy.signal.find_peaks,
+    incluidas las mesetas.
+    """
+    from scipy.signal import find_peaks
+
+    from streamliner.detector import _find_rms_peaks
+
+    rng = np.random.default_rng(1)
+    values = rng.random(500)
+    values[100:104] = 0.99  # Meseta: un único pico en su punto medio
+    values[[0, -1]] = 1.0  # Los extremos nunca son picos
+
+    expected, _ = find_peaks(values, height=0.6, distance=distance)
+    np.testing.assert_array_equal(_find_rms_peaks(values, 0.6, distance), expected)
+
+
+@pytest.mark.parametrize("distance", [3, 5, 10])
+def test_find_rms_peaks_ties_match_scipy(distance: int):
+    """
+    Con picos de la misma altura (ventanas saturadas a 1.0) se conservan los
+    mismos picos que scipy.signal.find_peaks.
+    """
+    from scipy.signal import find_peaks
+
+    from streamliner.detector import _find_rms_peaks
+
+    rng = np.random.default_rng(0)
+    values = np.minimum(rng.random(400) * 1.5, 1.0)
+    values[8], values[10], values[13] = 1.0, 1.0, 1.0
+
+    expected, _ = find_peaks(values, height=0.5, distance=distance)
+    np.testing.assert_array_equal(_find_rms_peaks(values, 0.5, distance), expected)
+
+
+@pytest.mark.parametrize("backend", ["closure", "automaton", "scan"])
+def test_keyword_score_counts_each_keyword_once(backend: str, detection_config):
+    """
+    El score de keywords es el mismo con la función especializada, con el
+    autómata Aho-Corasick y con la búsqueda simple, y cada keyword suma una sola
+    vez aunque aparezca varias veces.
+    """
+    import streamliner.detector as detector_module
+
+    if backend == "automaton" and detector_module.ahocorasick is None:
+        pytest.skip("pyahocorasick no está instalado")
+
+    # Pesos como los deja NumPy/YAML: el score debe seguir siendo un float
+    detection_config.keywords["clutch"] = np.float64(3.0)
+    with patch.object(
+        detector_module,
+        "KEYWORD_SCORER_MAX",
+        detector_module.KEYWORD_SCORER_MAX if backend == "closure" else 0,
+    ):
+        detector = HighlightDetector(detection_config, AsyncMock())
+    with patch.object(
+        detector_module,
+        "ahocorasick",
+        detector_module.ahocorasick if backend == "automaton" else None,
+    ):
+        general = detector._calculate_keyword_score("CLUTCH clutch epico", "otro")
+        streamer = detector._calculate_keyword_score("fail clutch", "test")
+
+    assert general == pytest.approx(5.0)
+    assert streamer == pytest.approx(2.0)
+
+
+@pytest.mark.asyncio
+async def test_find_highlights_accepts_in_memory_pcm(tmp_path: Path, detector):
+    """El PCM entregado por pipe (array a 16 kHz) se analiza sin escribir a disco."""
+    from streamliner.stt import TranscriptionResult as RealTranscriptionResult
+
+    pcm = np.full(16000 * 60, 0.01, dtype=np.float32)
+    pcm[16000 * 45 : 16000 * 46] = 0.5  # Pico de energía en el segundo 45
+
+    mock_transcriber = detector.transcriber
+    mock_transcriber.transcribe.return_value = RealTranscriptionResult(
+        text="clutch",
+        segments=[{"text": "clutch", "start": 1.0, "end": 3.0}],
+        language="es",
+    )
+
+    highlights = await detector.find_highlights(
+        pcm, 60, streamer_name="test_streamer", temp_dir=tmp_path
+    )
+
+    batch_audio = mock_transcriber.transcribe.call_args.args[0]
+    assert isinstance(batch_audio, np.ndarray)
+    assert list(tmp_path.iterdir()) == []
+    assert len(highlights) == 1
+    assert (highlights[0]["start_time"], highlights[0]["end_time"]) == (40.0, 50.0)
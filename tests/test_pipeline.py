@@ -0,0 +1,101 @@
+# tests/test_pipeline.py
+
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from streamliner import pipeline
+from streamliner.config import DetectionConfig, PathsConfig, RenderingConfig
+from streamliner.stt import Transcriber, TranscriptionResult
+
+
+@pytest.mark.asyncio
+async def test_vod_karaoke_retranscribes_with_word_timestamps(
+    tmp_path: Path, monkeypatch
+):
+    """
+    En modo karaoke, los clips de un VOD no reutilizan la transcripción del
+    detector (sin palabras): se vuelven a transcribir y el ASS lleva tags \\k.
+    """
+    vod = tmp_path / "vod.mp4"
+    vod.write_bytes(b"0")
+    config = SimpleNamespace(
+        paths=PathsConfig(data_dir=tmp_path, clips_dir=tmp_path / "clips"),
+        rendering=RenderingConfig(subtitle_mode="karaoke"),
+        detection=DetectionConfig(
+            clip_duration_seconds=10,
+            hype_score_threshold=1.0,
+            rms_peak_threshold=0.5,
+            scoring=None,
+            keywords={"clutch": 3.0},
+        ),
+    )
+
+    transcriber = Transcriber("tiny", "cpu", "int8", tmp_path / "models")
+    transcriber._load_model = AsyncMock()
+    word_timestamps_requested = []
+
+    def fake_transcription(audio_input, word_timestamps):
+        word_timestamps_requested.append(word_timestamps)
+        words = [
+            SimpleNamespace(start=0.0, end=0.4, word=" qué"),
+            SimpleNamespace(start=0.4, end=1.0, word=" clutch"),
+        ]
+        segment = SimpleNamespace(start=0.0, end=1.0, text=" qué clutch", words=words)
+        return [segment], SimpleNamespace(language="es")
+
+    transcriber._run_transcription = fake_transcription
+
+    # El detector entrega la transcripción por lotes: segmentos sin palabras
+    detector = SimpleNamespace(
+        find_highlights=AsyncMock(
+            return_value=[
+                {
+                    "start_time": 20.0,
+                    "end_time": 30.0,
+                    "score": 2.0,
+                    "transcription": TranscriptionResult(
+                        text="qué clutch",
+                        segments=[{"start": 0.0, "end": 1.0, "text": "qué clutch"}],
+                    ),
+                }
+            ]
+        )
+    )
+
+    subtitles = []
+
+    async def fake_render(input_path, output_path, srt_path, time_range=None):
+        subtitles.append(srt_path.read_text(encoding="utf-8"))
+        return output_path
+
+    context = SimpleNamespace(
+        transcriber=transcriber,
+        detector=detector,
+        renderer=SimpleNamespace(render_vertical_clip=fake_render),
+        publisher=None,
+        publish_queue=None,
+    )
+    monkeypatch.setattr(
+        pipeline.PipelineContext, "from_config", classmethod(lambda cls, c: context)
+    )
+    monkeypatch.setattr(
+        pipeline.HighlightDetector, "supports_direct_decode", lambda path: True
+    )
+    monkeypatch.setattr(pipeline, "_get_video_duration", AsyncMock(return_value=60.0))
+
+    async def fake_cut(self, input_path, start_time, end_time, output_filename):
+        clip = tmp_path / output_filename
+        clip.write_bytes(b"0")
+        return clip
+
+    monkeypatch.setattr(pipeline.VideoCutter, "cut_clip", fake_cut)
+
+    await pipeline.process_single_file(config, str(vod), "tester", dry_run=True)
+
+    assert word_timestamps_requested == [True]
+    assert len(subtitles) == 1
+    assert "{\\k40}" in subtitles[0]
+    assert "{\\k60}clutch" in subtitles[0]
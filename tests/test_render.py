@@ -0,0 +1,81 @@
+# tests/test_render.py
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from streamliner import render
+from streamliner.config import RenderingConfig
+from streamliner.render import VideoRenderer
+
+
+@pytest.mark.asyncio
+async def test_watchdog_kills_stalled_ffmpeg(monkeypatch):
+    """
+    Un proceso que informa progreso y luego se cuelga debe terminarse tras
+    `render_stall_seconds`, en vez de bloquear el worker indefinidamente.
+    """
+    monkeypatch.setattr(render, "RENDER_WATCHDOG_TICK_SECONDS", 0.05)
+    renderer = VideoRenderer(RenderingConfig(render_stall_seconds=0.3))
+
+    hung_ffmpeg = [
+        sys.executable,
+        "-c",
+        (
+            "import sys, time; print('progress=continue', flush=True); "
+            "sys.stderr.write('error de prueba'); sys.stderr.flush(); time.sleep(30)"
+        ),
+    ]
+
+    started = time.monotonic()
+    with pytest.raises(RuntimeError, match="sin progreso") as excinfo:
+        await renderer._run_ffmpeg_watched(hung_ffmpeg)
+
+    assert time.monotonic() - started < 5
+    assert "error de prueba" in str(excinfo.value)
+
+
+@pytest.mark.asyncio
+async def test_watchdog_returns_exit_code_and_stderr_tail():
+    renderer = VideoRenderer(RenderingConfig())
+
+    returncode, err_text = await renderer._run_ffmpeg_watched(
+        [
+            sys.executable,
+            "-c",
+            "import sys; print('progress=end'); sys.stderr.write('fallo'); sys.exit(3)",
+        ]
+    )
+
+    assert returncode == 3
+    assert err_text == "fallo"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "dimensions, expects_blur",
+    [((720, 1280), False), ((1080, 1920), False), ((1920, 1080), True)],
+)
+async def test_vertical_input_skips_blurred_background(
+    tmp_path, dimensions, expects_blur
+):
+    renderer = VideoRenderer(RenderingConfig())
+    graphs = []
+
+    async def fake_probe(path):
+        return (*dimensions, "aac")
+
+    async def fake_run(args):
+        script = args[args.index("-filter_complex_script") + 1]
+        graphs.append(Path(script).read_text(encoding="utf-8"))
+        return 0, ""
+
+    renderer._probe_input = fake_probe
+    renderer._run_ffmpeg_watched = fake_run
+
+    await renderer.render_vertical_clip(tmp_path / "in.mp4", tmp_path / "out.mp4")
+
+    assert ("boxblur" in graphs[0]) is expects_blur
+    assert ("split=2" in graphs[0]) is expects_blur
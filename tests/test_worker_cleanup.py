@@ -14,7 +14,8 @@ async def test_add_chunk_deletes_orphan(tmp_path, monkeypatch):
     a = tmp_path / "chunk_a.mp4"
     b = tmp_path / "chunk_b.mp4"
     c = tmp_path / "chunk_c.mp4"
-    for p in (a, b, c):
+    d = tmp_path / "chunk_d.mp4"
+    for p in (a, b, c, d):
         p.write_bytes(b"0" * 10)
 
     # Stub de config mínimo
@@ -46,6 +47,8 @@ async def test_add_chunk_deletes_orphan(tmp_path, monkeypatch):
         self.clip_processing_lock = asyncio.Lock()
         self.current_stream_time_offset = 0
         self._analysis_task = None
+        self._pinned_chunks = set()
+        self._deferred_deletes = set()
 
     monkeypatch.setattr(ProcessingWorker, "__init__", fake_init)
 
@@ -82,3 +85,185 @@ async def test_add_chunk_deletes_orphan(tmp_path, monkeypatch):
     assert b.exists() and c.exists(), "Chunks actuales no deben eliminarse"
     assert set(deleted) >= {"chunk_a.mp4"}
     assert list(worker.highlight_buffer) == [b, c]
+
+    # Un chunk de la ventana en análisis no se borra al ser expulsado
+    worker._pinned_chunks.add(b)
+    await worker.add_chunk_for_processing(d)
+    assert b.exists(), "El chunk en uso por el análisis no debe borrarse"
+    assert list(worker.highlight_buffer) == [c, d]
+
+    # Al terminar el análisis se libera y se borra
+    worker._pinned_chunks.discard(b)
+    await worker._delete_released_chunks()
+    assert not b.exists()
+    assert c.exists() and d.exists()
+
+
+@pytest.mark.asyncio
+async def test_submit_chunk_drops_oldest_when_queue_full(tmp_path, monkeypatch):
+    from src.streamliner.worker import ProcessingWorker
+
+    chunks = [tmp_path / f"chunk_{i}.mp4" for i in range(3)]
+    for p in chunks:
+        p.write_bytes(b"0" * 10)
+
+    def fake_init(self, streamer, stream_session_dir):
+        self.streamer = streamer
+        self.stream_session_dir = stream_session_dir
+        self._chunk_queue = asyncio.Queue(maxsize=2)
+        self._intake_task = None
+
+    monkeypatch.setattr(ProcessingWorker, "__init__", fake_init)
+
+    added = []
+    release = asyncio.Event()
+
+    async def slow_add(self, path):
+        await release.wait()
+        added.append(path)
+
+    monkeypatch.setattr(ProcessingWorker, "add_chunk_for_processing", slow_add)
+
+    async def fast_delete(self, path, max_retries=1, retry_delay=0):
+        path.unlink(missing_ok=True)
+
+    monkeypatch.setattr(ProcessingWorker, "_safe_delete", fast_delete)
+
+    worker = ProcessingWorker("tester", tmp_path)
+
+    # El consumidor toma el primero y se queda esperando; los demás llenan la cola
+    await worker.submit_chunk(chunks[0])
+    await asyncio.sleep(0)
+    await worker.submit_chunk(chunks[1])
+    await worker.submit_chunk(chunks[2])
+    extra = tmp_path / "chunk_3.mp4"
+    extra.write_bytes(b"0")
+    await worker.submit_chunk(extra)
+
+    assert not chunks[1].exists(), "El pendiente más antiguo debe descartarse"
+
+    release.set()
+    await worker._drain_chunk_queue()
+    assert added == [chunks[0], chunks[2], extra]
+    assert worker._intake_task is None
+
+
+@pytest.mark.asyncio
+async def test_buffer_pcm_decodes_each_chunk_once(tmp_path, monkeypatch):
+    import numpy as np
+
+    from src.streamliner.worker import HighlightDetector, ProcessingWorker
+
+    a, b, c = (tmp_path / f"chunk_{n}.mp4" for n in "abc")
+
+    def fake_init(self):
+        self.streamer = "tester"
+        self._chunk_pcm = {}
+
+    monkeypatch.setattr(ProcessingWorker, "__init__", fake_init)
+
+    decoded = []
+
+    def fake_decode(path):
+        decoded.append(path)
+        return np.full(4, len(decoded), dtype=np.float32)
+
+    monkeypatch.setattr(HighlightDetector, "supports_direct_decode", lambda p: True)
+    monkeypatch.setattr(HighlightDetector, "decode_audio", fake_decode)
+
+    worker = ProcessingWorker()
+    first = await worker._buffer_pcm([a, b])
+    second = await worker._buffer_pcm([b, c])
+
+    assert decoded == [a, b, c]
+    assert first.tolist() == [1.0] * 4 + [2.0] * 4
+    assert second.tolist() == [2.0] * 4 + [3.0] * 4
+    assert set(worker._chunk_pcm) == {b, c}
+
+
+@pytest.mark.asyncio
+async def test_buffer_pcm_only_silences_decode_errors(tmp_path, monkeypatch):
+    import numpy as np
+
+    from src.streamliner.worker import HighlightDetector, ProcessingWorker
+
+    broken, buggy = tmp_path / "broken.mp4", tmp_path / "buggy.mp4"
+
+    def fake_init(self):
+        self.streamer = "tester"
+        self._chunk_pcm = {}
+        self.config = type(
+            "C",
+            (),
+            {"real_time_processing": type("RT", (), {"chunk_duration_seconds": 1})},
+        )
+
+    monkeypatch.setattr(ProcessingWorker, "__init__", fake_init)
+
+    def fake_decode(path):
+        if path == broken:
+            raise OSError("contenedor truncado")
+        raise TypeError("bug en el decodificador")
+
+    monkeypatch.setattr(HighlightDetector, "supports_direct_decode", lambda p: True)
+    monkeypatch.setattr(HighlightDetector, "decode_audio", fake_decode)
+
+    worker = ProcessingWorker()
+    # Un chunk ilegible se sustituye por silencio para mantener los tiempos
+    pcm = await worker._buffer_pcm([broken])
+    assert pcm.tolist() == np.zeros(16000, dtype=np.float32).tolist()
+    # Un fallo que no es de decodificación no se oculta
+    with pytest.raises(TypeError):
+        await worker._buffer_pcm([buggy])
+
+
+@pytest.mark.asyncio
+async def test_render_stage_runs_clips_in_background(tmp_path, monkeypatch):
+    from src.streamliner import worker as worker_module
+    from src.streamliner.worker import ProcessingWorker
+
+    def fake_init(self):
+        self.config = None
+        self.streamer = "tester"
+        self.stream_session_dir = tmp_path
+        self.dry_run = True
+        self.transcriber = self.publisher = None
+        self.context = type("C", (), {"renderer": None, "publish_queue": None})()
+        self.clip_processing_lock = asyncio.Lock()
+        self._render_queue = asyncio.Queue(maxsize=2)
+        self._render_task = None
+
+    monkeypatch.setattr(ProcessingWorker, "__init__", fake_init)
+
+    async def fast_delete(self, path, max_retries=1, retry_delay=0):
+        path.unlink(missing_ok=True)
+
+    monkeypatch.setattr(ProcessingWorker, "_safe_delete", fast_delete)
+
+    rendered = []
+
+    async def fake_clip(config, transcriber, publisher, video_path, streamer, **kw):
+        assert video_path.exists()
+        rendered.append((video_path.name, kw["highlight_start_abs"]))
+
+    monkeypatch.setattr(worker_module, "process_and_create_clip", fake_clip)
+
+    worker = ProcessingWorker()
+    sources = [tmp_path / f"{worker.streamer}_highlight_{n}.mp4" for n in (10, 40)]
+    for n, source in zip((10, 40), sources):
+        source.write_bytes(b"0")
+        await worker._enqueue_render(
+            {
+                "video_path": source,
+                "transcription": None,
+                "buffer_start_abs": 0,
+                "highlight_start_abs": n,
+                "highlight_end_abs": n + 10,
+            }
+        )
+
+    await worker._drain_render_queue()
+
+    assert rendered == [(sources[0].name, 10), (sources[1].name, 40)]
+    assert not any(source.exists() for source in sources)
+    assert worker._render_task is None